@@ -1,30 +1,64 @@
 import os
+import json
+import asyncio
 from typing import Dict, List, Optional, Any
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from pymongo import MongoClient
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from src.helper import (
-    extract_candidate_info, 
-    generate_questions, 
-    store_interview_template,
-    get_stored_interview_template,
-    evaluate_answer,
-    generate_follow_up_question,
-    get_candidate_average_score
+    aextract_candidate_info,
+    agenerate_questions,
+    astore_interview_template,
+    aget_stored_interview_template,
+    aevaluate_answer,
+    aevaluate_answers_batch,
+    aevaluate_with_follow_up,
+    speculation_stats,
+    agenerate_follow_up_question,
+    astream_follow_up_question,
+    astream_evaluation,
+    aget_candidate_average_score
 )
+from src.llm import warm_up_if_enabled, active_llms
+from src.cache import evaluation_cache
+from src.parsing import OutputParseError, repair_stats
+from src.tokens import token_usage, load_encoder
+from src.ratelimit import LLMUnavailableError, guard_stats
+from src import metrics
+from src.cassette import cassette_stats
+from src.templates import template_cache_stats
+from src.storage import get_storage
+from src.indexes import ensure_indexes_safely
+from src.export import iter_rows, csv_chunks, parquet_chunks
 
 # Load environment variables
 load_dotenv()
 
-# MongoDB connection
+# MongoDB connection (async driver, created lazily on first use)
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
-db = client['aieta']
-candidates_collection = db['candidates']
 
 # Initialize FastAPI app
 app = FastAPI(title="Rupadi - AI Interviewer API")
+metrics.install_http_metrics(app)
+
+@app.on_event("startup")
+async def startup():
+    # Opt-in (LLM_WARMUP=1): build the LLM client before the first request
+    await asyncio.to_thread(warm_up_if_enabled)
+    # Token counting runs in every LLM callback; load its encoder before the first request
+    await asyncio.to_thread(load_encoder)
+    await asyncio.to_thread(ensure_indexes_safely)
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable(request, exc):
+    # Rate limited (429) or circuit open (503): tell clients when to come back
+    headers = {"Retry-After": str(max(1, round(exc.retry_after)))} if exc.retry_after is not None else None
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers=headers
+    )
 
 # Define data models
 class CandidateRequest(BaseModel):
@@ -34,56 +68,106 @@ class AnswerRequest(BaseModel):
     candidate_id: str
     question: str
     answer: str
+    include_follow_up: bool = False
+
+# One batch request must not be able to queue unbounded LLM work
+EVAL_BATCH_MAX_ITEMS = int(os.getenv("EVAL_BATCH_MAX_ITEMS", "100"))
+EVAL_BATCH_MAX_CONCURRENCY = int(os.getenv("EVAL_BATCH_MAX_CONCURRENCY", "20"))
+
+class AnswerItem(BaseModel):
+    question: str
+    answer: str
+
+class BatchAnswerRequest(BaseModel):
+    candidate_id: str
+    items: List[AnswerItem] = Field(max_length=EVAL_BATCH_MAX_ITEMS)
+    max_concurrency: Optional[int] = Field(None, ge=1, le=EVAL_BATCH_MAX_CONCURRENCY)
 
 class FollowUpRequest(BaseModel):
     candidate_id: str
     original_question: str
     previous_answer: str
 
+def sse(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 # API routes
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Rupadi AI Interviewer API", "status": "running"}
 
+@app.get("/stats")
+async def get_stats():
+    """Cache hit/miss counters, speculative follow-up usage, JSON repair paths, token usage, per-backend LLM latency and rate limiter state"""
+    return {
+        "evaluation_cache": evaluation_cache.stats(),
+        "speculative_follow_up": speculation_stats(),
+        "json_repair": repair_stats(),
+        "tokens": token_usage.stats(),
+        "llm_backends": {
+            name: llm.stats() for name, llm in active_llms().items() if hasattr(llm, "stats")
+        },
+        "llm_guard": guard_stats(),
+        "cassette": cassette_stats(),
+        "template_cache": template_cache_stats()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text format: helper, Mongo and route latency histograms, token and cache counters"""
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/candidates")
-def list_candidates():
-    """List all available candidates"""
+async def list_candidates(after: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), search: Optional[str] = None):
+    """List candidates one page at a time; pass `next_after` back as `after` for the next page"""
     try:
-        candidates = []
-        for candidate in candidates_collection.find({}, {'_id': 1, 'personal_information.first_name': 1}):
-            candidates.append({
-                "id": candidate['_id'],
-                "name": candidate['personal_information'].get('first_name', 'Unknown')
-            })
-        return {"candidates": candidates}
+        return await get_storage().alist_candidates_page(after=after, limit=limit, search=search)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching candidates: {str(e)}")
 
+@app.get("/candidates/stream")
+async def stream_candidates(search: Optional[str] = None):
+    """Every matching candidate as NDJSON, streamed straight from the cursor"""
+    async def rows():
+        async for candidate in get_storage().alist_candidates(search=search):
+            yield json.dumps(candidate, default=str) + "\n"
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
 @app.post("/prepare-interview")
-def prepare_interview(request: CandidateRequest):
+async def prepare_interview(request: CandidateRequest):
     """Extract candidate info and generate questions"""
     try:
-        candidate_data = extract_candidate_info(request.candidate_id)
+        candidate_data = await aextract_candidate_info(request.candidate_id)
         if not candidate_data:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
-        response, questions, greeting_script = generate_questions(candidate_data)
-        store_interview_template(candidate_data, greeting_script, questions)
+        response, questions, greeting_script = await agenerate_questions(candidate_data)
+        version = await astore_interview_template(candidate_data, greeting_script, questions)
         
         return {
             "candidate_id": request.candidate_id,
             "greeting": greeting_script,
             "questions": questions,
+            "version": version,
             "status": "success"
         }
+    except OutputParseError as e:
+        raise HTTPException(status_code=502, detail=f"LLM returned unusable questions: {str(e)}")
+    except (HTTPException, LLMUnavailableError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error preparing interview: {str(e)}")
 
 @app.get("/interview/{candidate_id}")
-def get_interview(candidate_id: str):
+async def get_interview(candidate_id: str):
     """Get stored interview questions for a candidate"""
     try:
-        greeting, questions = get_stored_interview_template(candidate_id)
+        greeting, questions = await aget_stored_interview_template(candidate_id)
         if not greeting or not questions:
             raise HTTPException(status_code=404, detail="Interview template not found")
         
@@ -92,44 +176,139 @@ def get_interview(candidate_id: str):
             "greeting": greeting,
             "questions": questions
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving interview: {str(e)}")
 
 @app.post("/evaluate-answer")
-def process_answer(request: AnswerRequest):
+async def process_answer(request: AnswerRequest):
     """Evaluate a candidate's answer to a question"""
     try:
-        evaluation = evaluate_answer(request.question, request.answer)
+        if request.include_follow_up:
+            evaluation, follow_up = await aevaluate_with_follow_up(request.question, request.answer)
+        else:
+            evaluation, follow_up = await aevaluate_answer(request.question, request.answer), None
         response = {
             "evaluation": evaluation["evaluation"],
             "needs_follow_up": evaluation["evaluation"]["score"] < 6
         }
+        if request.include_follow_up:
+            response["follow_up_question"] = follow_up
         return response
+    except OutputParseError as e:
+        raise HTTPException(status_code=502, detail=f"LLM returned an unusable evaluation: {str(e)}")
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error evaluating answer: {str(e)}")
 
+@app.post("/evaluate-answers:batch")
+async def process_answers_batch(request: BatchAnswerRequest):
+    """Evaluate a list of answers concurrently, reporting errors per item"""
+    results = await aevaluate_answers_batch(
+        [item.model_dump() for item in request.items],
+        max_concurrency=request.max_concurrency
+    )
+    for result in results:
+        evaluation = result["evaluation"]
+        result["evaluation"] = evaluation["evaluation"] if evaluation else None
+        result["needs_follow_up"] = evaluation["evaluation"]["score"] < 6 if evaluation else None
+    failed = sum(1 for result in results if result["error"])
+    return {
+        "candidate_id": request.candidate_id,
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
+    }
+
 @app.post("/generate-follow-up")
-def get_follow_up(request: FollowUpRequest):
+async def get_follow_up(request: FollowUpRequest):
     """Generate a follow-up question based on previous answer"""
     try:
-        follow_up = generate_follow_up_question(
+        follow_up = await agenerate_follow_up_question(
             request.original_question, 
             request.previous_answer
         )
         return {"follow_up_question": follow_up}
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating follow-up: {str(e)}")
 
+@app.get("/evaluate-answer/stream")
+async def stream_answer_evaluation(question: str, answer: str):
+    """Stream an evaluation as SSE: `score` as soon as it parses, then `feedback`, then `done`"""
+    async def events():
+        try:
+            async for event, data in astream_evaluation(question, answer):
+                if event == "done":
+                    data = {
+                        "evaluation": data["evaluation"],
+                        "needs_follow_up": data["evaluation"]["score"] < 6
+                    }
+                yield sse(event, data)
+        except Exception as e:
+            yield sse("error", {"detail": f"Error evaluating answer: {str(e)}"})
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/generate-follow-up/stream")
+async def stream_follow_up(question: str, answer: str):
+    """Stream a follow-up question as SSE `token` events, then `done` with the full text"""
+    async def events():
+        parts = []
+        try:
+            async for token in astream_follow_up_question(question, answer):
+                parts.append(token)
+                yield sse("token", {"text": token})
+            yield sse("done", {"follow_up_question": "".join(parts)})
+        except Exception as e:
+            yield sse("error", {"detail": f"Error generating follow-up: {str(e)}"})
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Declared before /results/{candidate_id} so "cohort" is not taken for an id
+@app.get("/results/cohort")
+async def get_cohort_results():
+    """Average score, percentiles and per-question stats across all candidates"""
+    try:
+        return await get_storage().acohort_stats()
+    except NotImplementedError:
+        raise HTTPException(status_code=501, detail=f"Cohort stats are not supported by the {get_storage().name} storage backend")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing cohort stats: {str(e)}")
+
 @app.get("/results/{candidate_id}")
-def get_results(candidate_id: str):
+async def get_results(candidate_id: str):
     """Get the interview results for a candidate"""
     try:
-        avg_score = get_candidate_average_score(candidate_id)
+        score = await aget_candidate_average_score(candidate_id)
+        if score is None:
+            raise HTTPException(status_code=404, detail="No interview found for this candidate")
+        interview = await get_storage().aget_interview(candidate_id)
         return {
-            "candidate_id": candidate_id,
-            "average_score": avg_score["average_score"],
-            "feedback": avg_score["feedback"],
-            "interactions": avg_score["interactions"]
+            **score,
+            "interactions": interview.get("interactions", []) if interview else []
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving results: {str(e)}")
+
+@app.get("/export/interviews")
+async def export_interviews(format: str = Query("csv", pattern="^(csv|parquet)$"), candidate_id: Optional[str] = None):
+    """Every answer (follow-ups included) as one row, streamed as CSV or Parquet from batched cursors"""
+    # iter_rows fetches the first batch of every stream before the 200 goes out, so a backend that
+    # cannot export or a failing query gets a status code instead of a truncated file
+    try:
+        rows = await asyncio.to_thread(iter_rows, candidate_id)
+    except NotImplementedError:
+        raise HTTPException(status_code=501, detail=f"Export is not supported by the {get_storage().name} storage backend")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting export: {str(e)}")
+    # Sync generators: Starlette iterates them on a worker thread
+    if format == "parquet":
+        body, media_type = parquet_chunks(rows, row_group_size=10000), "application/vnd.apache.parquet"
+    else:
+        body, media_type = csv_chunks(rows), "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="interviews.{format}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,24 +1,34 @@
 import streamlit as st
-import os
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
 from src.helper import extract_candidate_info, generate_questions, store_interview_template
+from src.llm import warm_up_if_enabled
+from src.ui import candidate_picker
+from src.indexes import ensure_indexes_safely
 
 load_dotenv()
-client = MongoClient(os.environ['MONGO_URI'])
-db = client['aieta']
-collection = db['candidates']
 
 st.set_page_config(layout="wide")
+
+@st.cache_resource
+def warm_up_llm():
+    # Runs once per process, and only sends a request when LLM_WARMUP=1
+    return warm_up_if_enabled()
+
+warm_up_llm()
+
+@st.cache_resource
+def ensure_db_indexes():
+    # Idempotent, but only worth doing once per process
+    return ensure_indexes_safely()
+
+ensure_db_indexes()
+
 st.title('🧠 Rupadi - AI Interviewer Bot')
 
-# Display basic candidate list
+# Paged, searchable candidate list
 st.subheader("Available Candidates:")
-for candidate in collection.find({}, {'_id': 1, 'personal_information.first_name': 1}):
-    st.write(f"🆔 {candidate['_id']} - 👤 {candidate['personal_information'].get('first_name', 'Unknown')}")
-
-candidate_id = st.text_input('Enter Candidate ID')
+candidate_id = candidate_picker("home")
 
 if st.button('Submit'):
     if candidate_id:
@@ -0,0 +1,125 @@
+"""Open-loop API load test at a target request rate.
+
+Sends requests on a fixed schedule (independent of how fast responses come
+back, so slow responses show up as latency rather than as a lower send rate)
+across /prepare-interview, /evaluate-answer and /generate-follow-up, then
+reports p50/p95/p99 latency, throughput and errors per endpoint.
+
+Run the API against the offline fake LLM, with the rate limiter opened up so
+it does not become the bottleneck being measured:
+
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY=0.4 LLM_RATE_INTERACTIVE=1000 LLM_BURST_INTERACTIVE=1000 \\
+        uvicorn api:app --port 8000
+    python benchmarks/api_load_test.py --url http://localhost:8000 --rps 20 --duration 30 \\
+        --candidate-id JOHDOE-20241013151130
+
+/prepare-interview needs a candidate that exists in MongoDB; without
+--candidate-id that endpoint is left out of the mix.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import percentile
+
+QUESTION = "Explain the bias-variance trade-off."
+ANSWER = "Simple models underfit and have high bias, flexible models overfit and have high variance."
+
+
+def payload(endpoint, i, candidate_id, cacheable):
+    # Unique answers by default so the evaluation cache does not serve the run
+    answer = ANSWER if cacheable else f"{ANSWER} (request {i})"
+    if endpoint == "/prepare-interview":
+        return {"candidate_id": candidate_id}
+    if endpoint == "/evaluate-answer":
+        return {"candidate_id": candidate_id or "load-test", "question": QUESTION, "answer": answer}
+    return {"candidate_id": candidate_id or "load-test", "original_question": QUESTION, "previous_answer": answer}
+
+
+def summarize(samples, elapsed):
+    latencies = [s["latency"] for s in samples if s["ok"]]
+    return {
+        "sent": len(samples),
+        "ok": len(latencies),
+        "errors": dict(Counter(str(s["status"]) for s in samples if not s["ok"])),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_s": round(statistics.median(latencies), 4) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 4) if latencies else None,
+        "p99_s": round(percentile(latencies, 99), 4) if latencies else None,
+        "max_s": round(max(latencies), 4) if latencies else None,
+    }
+
+
+async def run(url, endpoints, rps, duration, candidate_id, cacheable, timeout):
+    samples = {endpoint: [] for endpoint in endpoints}
+    in_flight = {"now": 0, "max": 0}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def one(i, endpoint):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            start = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload(endpoint, i, candidate_id, cacheable))
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finally:
+                in_flight["now"] -= 1
+            samples[endpoint].append({"latency": time.perf_counter() - start, "status": status, "ok": status == 200})
+
+        tasks = []
+        started = time.perf_counter()
+        total = int(rps * duration)
+        for i in range(total):
+            # Sleep until this request's slot rather than a fixed interval, so drift does not accumulate
+            delay = started + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, endpoints[i % len(endpoints)])))
+        send_elapsed = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    everything = [s for endpoint_samples in samples.values() for s in endpoint_samples]
+    return {
+        "target_rps": rps,
+        "achieved_send_rps": round(total / send_elapsed, 2) if send_elapsed else None,
+        "duration_s": round(elapsed, 2),
+        "max_in_flight": in_flight["max"],
+        "overall": summarize(everything, elapsed),
+        "endpoints": {endpoint: summarize(s, elapsed) for endpoint, s in samples.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=10, help="target requests per second across all endpoints")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send for")
+    parser.add_argument("--candidate-id", help="existing candidate for /prepare-interview")
+    parser.add_argument("--endpoints", nargs="+",
+                        default=["/prepare-interview", "/evaluate-answer", "/generate-follow-up"])
+    parser.add_argument("--cacheable", action="store_true", help="repeat identical answers so the evaluation cache can hit")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    endpoints = [e for e in args.endpoints if e != "/prepare-interview" or args.candidate_id]
+    result = asyncio.run(run(args.url, endpoints, args.rps, args.duration,
+                             args.candidate_id, args.cacheable, args.timeout))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Micro-benchmark of per-call chain overhead: rebuilding vs the chain registry.
+
+Uses langchain's FakeListLLM so only prompt parsing, chain construction and
+output parsing are measured, not the network. Both paths call the LLM through
+GuardedLLM, as every real chain does, with the rate limits raised so the token
+bucket never makes a call wait:
+
+    python benchmarks/chain_overhead_bench.py --calls 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+
+# Before the guard is first built
+for _name in ("INTERACTIVE", "BATCH"):
+    os.environ.setdefault(f"LLM_RATE_{_name}", "1000000")
+    os.environ.setdefault(f"LLM_BURST_{_name}", "1000000")
+
+from src.chains import get_chain
+from src.llm import register_provider, reset_llm
+from src.prompt import evaluation_prompt
+from src.ratelimit import GuardedLLM
+
+EVALUATION = json.dumps({"evaluation": {"score": 7, "feedback": ["Clear and correct."]}})
+INPUTS = {"question": "What is overfitting?", "answer": "When a model memorises the training data."}
+
+
+def rebuild_per_call(llm):
+    # What src/helper.py used to do on every call, behind the same guard as the registry
+    prompt = PromptTemplate(template=evaluation_prompt, input_variables=['question', 'answer'])
+    return (prompt | GuardedLLM(llm) | JsonOutputParser()).invoke(INPUTS)
+
+
+def registry(_llm):
+    return get_chain(evaluation_prompt, ['question', 'answer'], parser="json").invoke(INPUTS)
+
+
+def build_only(llm):
+    prompt = PromptTemplate(template=evaluation_prompt, input_variables=['question', 'answer'])
+    return prompt | GuardedLLM(llm) | JsonOutputParser()
+
+
+def lookup_only(_llm):
+    return get_chain(evaluation_prompt, ['question', 'answer'], parser="json")
+
+
+def measure(fn, llm, calls):
+    fn(llm)  # warm-up
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(llm)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    llm = FakeListLLM(responses=[EVALUATION])
+    register_provider("bench-fake", lambda: llm)
+    os.environ["LLM_PROVIDER"] = "bench-fake"
+    reset_llm()
+
+    report = {
+        "construct_per_call_us": round(measure(build_only, llm, args.calls), 1),
+        "registry_lookup_us": round(measure(lookup_only, llm, args.calls), 1),
+        "invoke_rebuild_per_call_us": round(measure(rebuild_per_call, llm, args.calls), 1),
+        "invoke_registry_us": round(measure(registry, llm, args.calls), 1),
+    }
+    report["saved_per_call_us"] = round(report["invoke_rebuild_per_call_us"] - report["invoke_registry_us"], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Concurrency scaling load test for a single API worker.
+
+Start one worker, then step through increasing numbers of concurrent clients
+and watch whether throughput keeps growing (async routes) or flattens at the
+threadpool size (sync routes):
+
+    uvicorn api:app --workers 1 --port 8000
+    python benchmarks/concurrency_load_test.py --url http://localhost:8000 --levels 1 4 16 64 128
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import percentile
+
+PAYLOADS = {
+    "/evaluate-answer": {
+        "candidate_id": "load-test",
+        "question": "Explain the bias-variance trade-off.",
+        "answer": "Simple models underfit and have high bias, flexible models overfit and have high variance.",
+    },
+    "/generate-follow-up": {
+        "candidate_id": "load-test",
+        "original_question": "Explain the bias-variance trade-off.",
+        "previous_answer": "Simple models underfit, complex models overfit.",
+    },
+}
+
+
+async def run_level(client, url, path, concurrency, duration, unique):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    counter = 0
+
+    async def worker():
+        nonlocal errors, counter
+        while time.perf_counter() < deadline:
+            payload = dict(PAYLOADS[path])
+            if unique:
+                # Defeat the evaluation cache so every request reaches the LLM
+                counter += 1
+                payload["answer" if "answer" in payload else "previous_answer"] += f" #{counter}"
+            start = time.perf_counter()
+            try:
+                response = await client.post(url + path, json=payload)
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_s": round(statistics.median(latencies), 3) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 3) if latencies else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", choices=sorted(PAYLOADS), default="/evaluate-answer")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--cached", action="store_true", help="reuse one payload (measures cache hits)")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        for level in args.levels:
+            result = await run_level(client, args.url, args.path, level, args.duration, not args.cached)
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""Rerun latency of pages/hr_round.py with and without the template cache.
+
+Streamlit reruns the whole page on every click, and each rerun looks up the
+candidate's interview template. This drives the real page with Streamlit's
+AppTest (no LLM calls happen until an answer is submitted) against MONGO_URI,
+first with template_cache disabled, then enabled:
+
+    python benchmarks/hr_round_rerun_bench.py --reruns 50 --candidate-id JOHDOE-20241013151130
+
+The candidate needs a stored template (prepare them on the home page first).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dotenv import load_dotenv
+from streamlit.testing.v1 import AppTest
+
+from src import templates
+from src.helper import get_stored_interview_template
+from src.metrics import percentile
+
+load_dotenv()
+
+PAGE = os.path.join(ROOT, "pages", "hr_round.py")
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+    }
+
+
+def time_reruns(candidate_id, reruns):
+    app = AppTest.from_file(PAGE, default_timeout=60)
+    app.session_state["candidate_id"] = candidate_id
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        sys.exit(f"Page failed: {app.exception[0].message}")
+
+    latencies = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+    return {"first_run_ms": round(first * 1000, 2), **summarize(latencies)}
+
+
+def time_lookups(candidate_id, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        get_stored_interview_template(candidate_id)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def run_mode(candidate_id, reruns, cached):
+    # LRUCache.set is a no-op at maxsize 0, so every lookup goes to Mongo
+    templates.template_cache.maxsize = int(os.getenv("TEMPLATE_CACHE_SIZE", "1024")) if cached else 0
+    templates.invalidate()
+    before = templates.template_cache_stats()
+    result = {
+        "rerun": time_reruns(candidate_id, reruns),
+        "template_lookup": time_lookups(candidate_id, reruns),
+    }
+    after = templates.template_cache_stats()
+    result["cache_hits"] = after["hits"] - before["hits"]
+    result["cache_misses"] = after["misses"] - before["misses"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--candidate-id", default="JOHDOE-20241013151130")
+    args = parser.parse_args()
+
+    if not os.getenv("MONGO_URI"):
+        sys.exit("MONGO_URI is not set")
+    if get_stored_interview_template(args.candidate_id)[0] is None:
+        sys.exit(f"No interview template stored for {args.candidate_id}")
+
+    uncached = run_mode(args.candidate_id, args.reruns, cached=False)
+    cached = run_mode(args.candidate_id, args.reruns, cached=True)
+    print(json.dumps({
+        "reruns": args.reruns,
+        "without_cache": uncached,
+        "with_cache": cached,
+        "rerun_speedup_p50": round(uncached["rerun"]["p50_ms"] / cached["rerun"]["p50_ms"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
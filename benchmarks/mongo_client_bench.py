@@ -0,0 +1,77 @@
+"""Per-call latency of a fresh MongoClient per call vs the shared pooled client.
+
+The helpers used to build MongoClient(MONGO_URI) inside every call, paying
+for DNS/SRV resolution, TLS and server discovery each time. This times the
+same find_one both ways against MONGO_URI:
+
+    python benchmarks/mongo_client_bench.py --calls 50 --candidate-id JOHDOE-20241013151130
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from src import repository
+from src.db import DEFAULT_DB
+from src.metrics import percentile
+
+load_dotenv()
+
+
+def per_call_client(candidate_id):
+    # What extract_candidate_info did before src.db
+    client = MongoClient(os.getenv("MONGO_URI"))
+    try:
+        return client[DEFAULT_DB]["candidates"].find_one({"_id": candidate_id})
+    finally:
+        client.close()
+
+
+def time_calls(fn, candidate_id, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(candidate_id)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "first_call_ms": round(latencies[0] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--candidate-id", default="JOHDOE-20241013151130")
+    args = parser.parse_args()
+
+    if not os.getenv("MONGO_URI"):
+        sys.exit("MONGO_URI is not set")
+
+    before = time_calls(per_call_client, args.candidate_id, args.calls)
+    after = time_calls(repository.get_candidate, args.candidate_id, args.calls)
+    print(json.dumps({
+        "calls": args.calls,
+        "per_call_client": summarize(before),
+        "pooled_client": summarize(after),
+        "speedup_p50": round(statistics.median(before) / statistics.median(after), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
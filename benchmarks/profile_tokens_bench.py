@@ -0,0 +1,54 @@
+"""Prompt-token reduction from compacting candidate profiles.
+
+Compares the generate_questions prompt built from the raw candidate document
+(what used to be sent) with the compact profile, over research/dummy_candidates.json:
+
+    python benchmarks/profile_tokens_bench.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.profile import compact_candidate_profile
+from src.prompt import genearte_questions_prompt
+from src.tokens import count_tokens
+
+
+def prompt_tokens(candidate_text):
+    return count_tokens(genearte_questions_prompt.format(candidate_data=candidate_text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", default=os.path.join(ROOT, "research", "dummy_candidates.json"))
+    args = parser.parse_args()
+
+    with open(args.file) as f:
+        candidates = json.load(f)
+
+    rows = []
+    for candidate in candidates:
+        # PromptTemplate formatted the dict with str(), i.e. its Python repr
+        raw = str(candidate)
+        compact = compact_candidate_profile(candidate)
+        rows.append({
+            "candidate_id": candidate.get("id", candidate.get("_id")),
+            "raw_profile_tokens": count_tokens(raw),
+            "compact_profile_tokens": count_tokens(compact),
+            "raw_prompt_tokens": prompt_tokens(raw),
+            "compact_prompt_tokens": prompt_tokens(compact),
+        })
+
+    totals = {key: sum(row[key] for row in rows) for key in rows[0] if key != "candidate_id"}
+    totals["profile_reduction_pct"] = round(100 * (1 - totals["compact_profile_tokens"] / totals["raw_profile_tokens"]), 1)
+    totals["prompt_reduction_pct"] = round(100 * (1 - totals["compact_prompt_tokens"] / totals["raw_prompt_tokens"]), 1)
+    print(json.dumps({"candidates": rows, "totals": totals}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Replay full interview sessions from a cassette as a regression benchmark.
+
+A session is what a candidate goes through: question generation, then an
+evaluation of every answer plus a follow-up for weak ones. Record sessions
+once against a live (or fake) LLM, then replay them offline after changing
+prompts or chains and compare timings:
+
+    python benchmarks/replay_session_bench.py --mode record --cassette cassettes/sessions.jsonl.gz
+    python benchmarks/replay_session_bench.py --cassette cassettes/sessions.jsonl.gz
+    python benchmarks/replay_session_bench.py --cassette cassettes/sessions.jsonl.gz --latency-scale 0
+
+With --latency-scale 0 only local overhead (prompt formatting, parsing,
+validation) is measured. A changed prompt misses the cassette and is reported
+as a cassette miss rather than silently calling a model.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Every call must reach the chains so replay sees the same sequence as recording
+os.environ["EVAL_CACHE_ENABLED"] = "0"
+os.environ["SPECULATIVE_FOLLOW_UP"] = "0"
+
+from src.cassette import CassetteMissError, cassette_stats, use_cassette
+from src.helper import evaluate_with_follow_up, generate_questions
+
+ANSWERS = [
+    "I would start with a simple baseline, check the validation curve and only then add complexity.",
+    "Not sure, I think it just means using more data.",
+    "I split the data with stratified k-fold, tuned on the inner folds and reported the outer-fold score.",
+    "We monitored drift weekly and retrained when the population stability index crossed 0.2.",
+]
+
+
+def run_session(candidate):
+    timings = {"generate_questions": [], "evaluate_with_follow_up": []}
+    start = time.perf_counter()
+    _, questions, _ = generate_questions(candidate)
+    timings["generate_questions"].append(time.perf_counter() - start)
+    follow_ups = 0
+    for i, question in enumerate(questions):
+        step = time.perf_counter()
+        _, follow_up = evaluate_with_follow_up(question, ANSWERS[i % len(ANSWERS)])
+        timings["evaluate_with_follow_up"].append(time.perf_counter() - step)
+        follow_ups += follow_up is not None
+    return time.perf_counter() - start, timings, follow_ups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", default=os.path.join(ROOT, "cassettes", "sessions.jsonl.gz"))
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply recorded latencies on replay")
+    parser.add_argument("--file", default=os.path.join(ROOT, "research", "dummy_candidates.json"))
+    parser.add_argument("--sessions", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.file) as f:
+        candidates = json.load(f)[:args.sessions]
+
+    use_cassette(args.cassette, args.mode, args.latency_scale)
+
+    sessions, steps, misses = [], {}, []
+    for candidate in candidates:
+        try:
+            elapsed, timings, follow_ups = run_session(candidate)
+        except CassetteMissError as e:
+            misses.append(str(e))
+            continue
+        sessions.append({"candidate": candidate.get("id", candidate.get("_id")), "seconds": round(elapsed, 3), "follow_ups": follow_ups})
+        for step, values in timings.items():
+            steps.setdefault(step, []).extend(values)
+
+    print(json.dumps({
+        "mode": args.mode,
+        "sessions": sessions,
+        "session_mean_s": round(statistics.mean(s["seconds"] for s in sessions), 3) if sessions else None,
+        "steps_mean_s": {step: round(statistics.mean(v), 4) for step, v in steps.items()},
+        "cassette": cassette_stats(),
+        "cassette_misses": misses,
+    }, indent=2))
+    if misses:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Hedged router benchmark against local fake backends.
+
+Two in-process backends with injected delays: a "flaky" primary that is
+usually fast but sometimes stalls, and a steady secondary. Runs the same
+workload through the primary alone and through LLMRouter, and compares tail
+latency. Hedging, failover and cancellation are covered by tests/test_router.py.
+
+    python benchmarks/router_bench.py --calls 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.runnables import Runnable
+
+from src.metrics import percentile
+from src.router import LLMRouter
+
+
+class DelayedBackend(Runnable):
+    """Answers after `delay()` seconds, failing with probability `failure_rate`."""
+
+    def __init__(self, name, delay, failure_rate=0.0, seed=0):
+        self.name = name
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.cancelled = 0
+
+    def _plan(self):
+        return self.delay(self.rng), self.rng.random() < self.failure_rate
+
+    def invoke(self, input, config=None, **kwargs):
+        delay, fail = self._plan()
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{self.name} failed")
+        return f"{self.name}: {input}"
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        delay, fail = self._plan()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if fail:
+            raise RuntimeError(f"{self.name} failed")
+        return f"{self.name}: {input}"
+
+
+def flaky(rng):
+    # 90% fast, 10% stalls for 1-2 s
+    return rng.uniform(0.02, 0.05) if rng.random() < 0.9 else rng.uniform(1.0, 2.0)
+
+
+def steady(rng):
+    return rng.uniform(0.05, 0.08)
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "p50_s": round(statistics.median(ordered), 4),
+        "p95_s": round(percentile(ordered, 95), 4),
+        "p99_s": round(percentile(ordered, 99), 4),
+        "max_s": round(ordered[-1], 4),
+    }
+
+
+async def run(target, calls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await target.ainvoke(f"prompt {i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    single = DelayedBackend("flaky", flaky, seed=1)
+    baseline = await run(single, args.calls, args.concurrency)
+
+    router = LLMRouter(
+        [("flaky", DelayedBackend("flaky", flaky, seed=1)), ("steady", DelayedBackend("steady", steady, seed=2))],
+        initial_hedge_delay=0.1, min_samples=10,
+    )
+    hedged = await run(router, args.calls, args.concurrency)
+
+    print(json.dumps({
+        "single_backend": summarize(baseline),
+        "hedged_router": summarize(hedged),
+        "backend_stats": router.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Startup benchmark: import time and time to first request for api.py and app.py.
+
+Every measurement runs in a fresh interpreter so module caches do not hide the
+cold-start cost (which is what a new uvicorn worker or Lambda container pays).
+
+    python benchmarks/startup_bench.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import api
+t1 = time.perf_counter()
+import httpx
+
+async def first_request():
+    # ASGITransport sends no lifespan events, so run the startup handlers ourselves
+    await api.app.router.startup()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://api") as client:
+        (await client.get("/")).raise_for_status()
+
+asyncio.run(first_request())
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_request_s": t2 - t1}))
+"""
+
+APP_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import src.helper
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_request_s": t2 - t1}))
+"""
+
+
+def run_probe(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples, key):
+    values = [s[key] for s in samples]
+    return {"median_s": round(statistics.median(values), 4), "max_s": round(max(values), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--target", choices=["api", "app", "all"], default="all")
+    args = parser.parse_args()
+
+    probes = {"api": API_PROBE, "app": APP_PROBE}
+    targets = list(probes) if args.target == "all" else [args.target]
+    report = {}
+    for name in targets:
+        samples = [run_probe(probes[name]) for _ in range(args.runs)]
+        report[name] = {
+            "import": summarize(samples, "import_s"),
+            "first_request": summarize(samples, "first_request_s"),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
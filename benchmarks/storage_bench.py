@@ -0,0 +1,184 @@
+"""Compare storage backends on the app's real access patterns.
+
+Seeds each backend with synthetic candidates (variations of
+research/dummy_candidates.json), then times the operations the app issues:
+candidate lookups, picker pages and searches, template store / latest lookup,
+an HR round (one interaction write per answer, a follow-up, the score), coding
+submissions and diagrams. The template cache is disabled so every lookup
+reaches the backend.
+
+    python benchmarks/storage_bench.py --candidates 5000 --ops 500
+    python benchmarks/storage_bench.py --backends sqlite-memory,sqlite-file,mongo
+
+The mongo backend needs MONGO_URI and always writes to the aieta_storage_bench
+database (whatever MONGO_DB says), which is dropped afterwards; its coding
+submissions go to the shared coding database and are deleted again.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+BENCH_DB = "aieta_storage_bench"
+# Unconditionally: cleanup() drops this database, so it must never be the app's
+os.environ["MONGO_DB"] = BENCH_DB
+
+from bson import ObjectId
+
+from src import templates
+from src.db import get_db
+from src.importer import prepare
+from src.indexes import ensure_indexes
+from src.metrics import percentile
+from src.repository import CODING_DB, CODING_SUBMISSIONS
+from src.storage import MongoStorage, SQLiteStorage
+
+PREFIX = "BENCH-"
+QUESTIONS = 10
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "ops": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+    }
+
+
+def timed(fn, args_list):
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def make_candidates(count):
+    with open(os.path.join(ROOT, "research", "dummy_candidates.json"), encoding="utf-8") as f:
+        samples = [prepare(raw)[0] for raw in json.load(f)]
+    candidates = []
+    for i in range(count):
+        doc = json.loads(json.dumps(samples[i % len(samples)], default=str))
+        doc["_id"] = doc["id"] = f"{PREFIX}{i:08d}"
+        doc["personal_information"]["first_name"] += str(i % 100)
+        candidates.append(doc)
+    return candidates
+
+
+def template_for(candidate_id, revision=0):
+    return {
+        "candidate_id": candidate_id,
+        "greeting_script": f"Hello {candidate_id}",
+        "questions": [f"Question {q} (rev {revision}) for {candidate_id}" for q in range(QUESTIONS)],
+    }
+
+
+def run_backend(storage, candidates, ops, rng):
+    ids = [c["_id"] for c in candidates]
+    result = {}
+
+    start = time.perf_counter()
+    for i in range(0, len(candidates), 500):
+        storage.upsert_candidates(candidates[i:i + 500])
+    elapsed = time.perf_counter() - start
+    result["seed_candidates"] = {"rows": len(candidates), "rows_per_second": round(len(candidates) / elapsed, 1)}
+
+    sample = [(cid,) for cid in rng.sample(ids, min(ops, len(ids)))]
+    result["get_candidate"] = timed(storage.get_candidate, sample)
+    result["list_candidates_page"] = timed(
+        lambda after: storage.list_candidates_page(after=after, limit=20), [(rng.choice(ids),) for _ in range(ops)])
+    result["search_candidates"] = timed(
+        lambda search: storage.list_candidates_page(limit=20, search=search),
+        [(rng.choice(["Jo", "am", "Be", PREFIX + "0000"]),) for _ in range(ops)])
+
+    result["store_template"] = timed(lambda cid: storage.store_template(template_for(cid)), sample)
+    result["store_template_unchanged"] = timed(lambda cid: storage.store_template(template_for(cid)), sample)
+    result["store_template_new_version"] = timed(lambda cid: storage.store_template(template_for(cid, 1)), sample)
+    result["get_latest_template"] = timed(storage.get_latest_template, sample)
+
+    # One HR round per sampled candidate: a write per answer, a follow-up, then the score
+    rounds = [(cid, ObjectId()) for cid, in sample[:max(1, ops // QUESTIONS)]]
+    writes = [(iid, cid, {"id": f"q{q}", "question": f"Question {q}", "answer": "An answer", "score": rng.randint(1, 10)})
+              for cid, iid in rounds for q in range(QUESTIONS)]
+    result["append_interaction"] = timed(storage.append_interaction, writes)
+    result["append_interaction_replay"] = timed(storage.append_interaction, writes[:len(rounds)])
+    result["set_interaction_field"] = timed(
+        storage.set_interaction_field, [(iid, cid, "q0", "follow_up_1", {"score": 7}) for cid, iid in rounds])
+    result["complete_interview"] = timed(storage.complete_interview, [(iid, cid) for cid, iid in rounds])
+    result["get_interview"] = timed(storage.get_interview, [(cid,) for cid, _ in rounds])
+    result["get_candidate_score"] = timed(storage.get_candidate_score, [(cid,) for cid, _ in rounds])
+
+    result["insert_coding_submission"] = timed(storage.insert_coding_submission, [
+        ({"candidate_id": cid, "timestamp": datetime.now(), "problem": "Sum the even numbers",
+          "submitted_code": "def f(xs): return sum(x for x in xs if x % 2 == 0)", "execution_result": "ok"},)
+        for cid, in sample])
+    diagram = os.urandom(50_000)
+    result["save_diagram"] = timed(lambda cid: storage.save_diagram(cid, "design.png", diagram), sample[:max(1, ops // 5)])
+    result["get_latest_diagram"] = timed(storage.get_latest_diagram, sample[:max(1, ops // 5)])
+    return result
+
+
+def build(name, workdir):
+    if name == "sqlite-memory":
+        return SQLiteStorage(":memory:")
+    if name == "sqlite-file":
+        return SQLiteStorage(os.path.join(workdir, "storage_bench.db"))
+    if name == "mongo":
+        if not os.getenv("MONGO_URI"):
+            return None
+        ensure_indexes()
+        return MongoStorage()
+    raise ValueError(f"Unknown backend {name}")
+
+
+def cleanup(name, storage):
+    storage.close()
+    if name == "mongo":
+        if get_db().name != BENCH_DB:
+            raise RuntimeError(f"Refusing to drop database {get_db().name!r}; expected {BENCH_DB!r}")
+        get_db().client.drop_database(BENCH_DB)
+        get_db(CODING_DB)[CODING_SUBMISSIONS].delete_many({"candidate_id": {"$regex": f"^{PREFIX}"}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--ops", type=int, default=500, help="operations timed per access pattern")
+    parser.add_argument("--backends", default="sqlite-memory,sqlite-file,mongo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Every template lookup should reach the backend
+    templates.template_cache.maxsize = 0
+    candidates = make_candidates(args.candidates)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.backends.split(","):
+            storage = build(name, workdir)
+            if storage is None:
+                results[name] = "skipped (MONGO_URI is not set)"
+                continue
+            try:
+                results[name] = run_backend(storage, candidates, args.ops, random.Random(args.seed))
+            finally:
+                cleanup(name, storage)
+    print(json.dumps({"candidates": args.candidates, "ops": args.ops, "backends": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
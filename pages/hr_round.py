@@ -1,14 +1,63 @@
 import streamlit as st
-from src.helper import get_stored_interview_template, evaluate_answer, generate_follow_up_question, get_candidate_average_score
-from pymongo import MongoClient
-import os
+from src.helper import (
+    get_stored_interview_template,
+    record_interaction,
+    record_follow_up,
+    complete_interview,
+    stream_evaluation,
+    stream_follow_up_question,
+    start_speculative_follow_up_stream,
+    get_candidate_average_score,
+    FOLLOW_UP_THRESHOLD,
+    SPECULATIVE_FOLLOW_UP
+)
+from src.parsing import OutputParseError
+from bson import ObjectId
 from dotenv import load_dotenv
 from src.prompt import *
 
 load_dotenv()
-client = MongoClient(os.environ['MONGO_URI'])
-db = client['aieta']
-collection = db['interviews']
+
+def show_evaluation(question, answer):
+    """Render the score as soon as it is parsed and the feedback as it streams in"""
+    score_slot = st.empty()
+    feedback_slot = st.empty()
+    evaluation = None
+    for event, data in stream_evaluation(question, answer):
+        if event == "score":
+            score_slot.markdown(f"📊 **Evaluation Score:** {data}")
+        elif event == "feedback":
+            feedback_slot.markdown("\n".join(f"- {fb}" for fb in data))
+        elif event == "done":
+            evaluation = data
+    return evaluation
+
+def ask_follow_up(label, question, answer, speculation=None):
+    """Stream a follow-up question onto the page and return its full text"""
+    st.markdown(f"**💬 {label}:**")
+    if speculation is not None:
+        return st.write_stream(speculation.use())
+    return st.write_stream(stream_follow_up_question(question, answer))
+
+def evaluate_and_follow_up(label, question, answer):
+    """Evaluate an answer, streaming a follow-up when the score is too low.
+
+    With SPECULATIVE_FOLLOW_UP=1 the follow-up starts streaming in the
+    background while the evaluation runs and is dropped for good answers.
+    """
+    speculation = start_speculative_follow_up_stream(question, answer) if SPECULATIVE_FOLLOW_UP else None
+    try:
+        evaluation = show_evaluation(question, answer)
+    except Exception:
+        if speculation is not None:
+            speculation.discard()
+        raise
+    follow_up = None
+    if evaluation["evaluation"]["score"] < FOLLOW_UP_THRESHOLD:
+        follow_up = ask_follow_up(label, question, answer, speculation)
+    elif speculation is not None:
+        speculation.discard()
+    return evaluation, follow_up
 
 st.set_page_config(layout="wide")
 st.title("🧠 AI Interview Room")
@@ -22,6 +71,9 @@ greeting, questions = get_stored_interview_template(candidate_id)
 
 # Initialize session state
 if "interview_data" not in st.session_state:
+    # Answers are written to this interview document as they finish (see
+    # record_interaction), so a crashed session loses at most the current one
+    st.session_state.interview_id = ObjectId()
     st.session_state.interview_data = {
         "candidate_id": candidate_id,
         "interactions": []
@@ -41,7 +93,10 @@ with col1:
         st.markdown(f"**Q{st.session_state.question_index + 1}:** {current_question}")
     else:
         st.success("✅ Interview completed!")
-        collection.insert_one(st.session_state.interview_data)
+        # Idempotent anyway; the flag just saves a write on every rerun
+        if not st.session_state.get("interview_completed"):
+            complete_interview(st.session_state.interview_id, candidate_id)
+            st.session_state.interview_completed = True
         st.json(st.session_state.interview_data)
         if st.button('Start Coding Round'):
             # Ensure candidate_id persists in session state
@@ -69,16 +124,23 @@ with col2:
         
         with button_col1:
             if st.button("Submit Answer"):
-                evaluation = evaluate_answer(current_question, answer_text)
+                try:
+                    evaluation, follow_up = evaluate_and_follow_up("Follow-up 1", current_question, answer_text)
+                except OutputParseError as e:
+                    st.error(f"❌ Could not read the evaluation, please submit again: {e}")
+                    st.stop()
                 st.session_state.latest_interaction = {
+                    # Idempotency token: one interaction per question per session
+                    "id": f"q{st.session_state.question_index}",
                     "question": current_question,
                     "answer": answer_text,
                     "score": evaluation["evaluation"]["score"],
                     "feedback": evaluation["evaluation"]["feedback"]
                 }
+                record_interaction(st.session_state.interview_id, candidate_id, st.session_state.latest_interaction)
                 st.session_state.evaluation_score = evaluation["evaluation"]["score"]
-                if evaluation["evaluation"]["score"] < 6:
-                    st.session_state.f1 = generate_follow_up_question(current_question, answer_text)
+                if follow_up is not None:
+                    st.session_state.f1 = follow_up
                     st.session_state.step = "followup1"
                 else:
                     st.session_state.interview_data["interactions"].append(st.session_state.latest_interaction)
@@ -87,8 +149,8 @@ with col2:
 
         with button_col2:
             if st.button("Next Round ➡️"):
-                # Save interview data
-                collection.insert_one(st.session_state.interview_data)
+                # Answers are already saved; just mark the interview finished
+                complete_interview(st.session_state.interview_id, candidate_id)
                 # Maintain candidate_id in session state
                 st.session_state.candidate_id = candidate_id
                 # Navigate to Python coding round
@@ -99,16 +161,22 @@ with col2:
         st.markdown(f"**💬 Follow-up 1:** {st.session_state.f1}")
         f1_input = st.text_area("Answer to Follow-up 1:")
         if st.button("Submit Follow-up 1"):
-            eval1 = evaluate_answer(st.session_state.f1, f1_input)
+            try:
+                eval1, follow_up = evaluate_and_follow_up("Follow-up 2", st.session_state.f1, f1_input)
+            except OutputParseError as e:
+                st.error(f"❌ Could not read the evaluation, please submit again: {e}")
+                st.stop()
             st.session_state.latest_interaction["follow_up_1"] = {
                 "question": st.session_state.f1,
                 "answer": f1_input,
                 "score": eval1["evaluation"]["score"],
                 "feedback": eval1["evaluation"]["feedback"]
             }
+            record_follow_up(st.session_state.interview_id, candidate_id, st.session_state.latest_interaction["id"],
+                             "follow_up_1", st.session_state.latest_interaction["follow_up_1"])
 
-            if eval1["evaluation"]["score"] < 6:
-                st.session_state.f2 = generate_follow_up_question(st.session_state.f1, f1_input)
+            if follow_up is not None:
+                st.session_state.f2 = follow_up
                 st.session_state.step = "followup2"
             else:
                 st.session_state.interview_data["interactions"].append(st.session_state.latest_interaction)
@@ -121,13 +189,19 @@ with col2:
         st.markdown(f"**💬 Follow-up 2:** {st.session_state.f2}")
         f2_input = st.text_area("Answer to Follow-up 2:")
         if st.button("Submit Follow-up 2"):
-            eval2 = evaluate_answer(st.session_state.f2, f2_input)
+            try:
+                eval2 = show_evaluation(st.session_state.f2, f2_input)
+            except OutputParseError as e:
+                st.error(f"❌ Could not read the evaluation, please submit again: {e}")
+                st.stop()
             st.session_state.latest_interaction["follow_up_2"] = {
                 "question": st.session_state.f2,
                 "answer": f2_input,
                 "score": eval2["evaluation"]["score"],
                 "feedback": eval2["evaluation"]["feedback"]
             }
+            record_follow_up(st.session_state.interview_id, candidate_id, st.session_state.latest_interaction["id"],
+                             "follow_up_2", st.session_state.latest_interaction["follow_up_2"])
 
             st.session_state.interview_data["interactions"].append(st.session_state.latest_interaction)
             st.session_state.question_index += 1
@@ -2,21 +2,11 @@ import streamlit as st
 from src.helper import code_executor
 from src.prompt import *
 from datetime import datetime
-from pymongo import MongoClient
+from src.storage import get_storage
 import json
-import os
-
-MongoURI = os.getenv('MONGO_URI')
-# MongoDB connection setup
-try:
-    client = MongoClient(MongoURI)
-    db = client['ai_interviewer']
-    coding_collection = db['coding_submissions']
-except Exception as e:
-    st.error(f"Failed to connect to MongoDB: {e}")
 
 def save_submission(candidate_id, problem, code, response):
-    """Save coding submission to MongoDB"""
+    """Save coding submission to the configured storage backend"""
     try:
         submission = {
             'candidate_id': candidate_id,
@@ -25,8 +15,7 @@ def save_submission(candidate_id, problem, code, response):
             'submitted_code': code,
             'execution_result': response,
         }
-        result = coding_collection.insert_one(submission)
-        return result.inserted_id
+        return get_storage().insert_coding_submission(submission)
     except Exception as e:
         st.error(f"Failed to save submission: {e}")
         return None
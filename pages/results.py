@@ -1,41 +1,29 @@
-import os
 import streamlit as st
-from pymongo import MongoClient
 from src.helper import get_candidate_average_score
-
-# --------------------------
-# MongoDB Connection
-# --------------------------
-MONGO_URI = os.environ.get('MONGO_URI')
-client = MongoClient(MONGO_URI)
-db = client['aieta']
-candidates_collection = db['candidates']
-interviews_collection = db['interviews']
+from src.storage import get_storage
+from src.ui import candidate_picker
 
 # --------------------------
 # Streamlit UI
 # --------------------------
 st.title('📊 Candidate Interview Scores')
 
-# Display Available Candidates
+# Available Candidates (paged, searchable)
 st.subheader("Available Candidates:")
-for candidate in candidates_collection.find({}, {'_id': 1, 'personal_information.first_name': 1}):
-    name = candidate.get('personal_information', {}).get('first_name', 'Unknown')
-    st.write(f"🆔 {candidate['_id']} - 👤 {name}")
-
-# Input Field
-candidate_id = st.text_input('🔍 Enter Candidate ID')
+candidate_id = candidate_picker("results")
 
 # Handle Submit Button
 if st.button('Submit'):
     if candidate_id:
         # Fetch score details
-        avg_score, total_questions, total_score = get_candidate_average_score(candidate_id)
-        
-        st.success(f'✅ **Average Score:** {avg_score}\n\n📌 **Total Questions:** {total_questions}\n\n🏆 **Total Score:** {total_score}')
+        score = get_candidate_average_score(candidate_id)
+        if score and score["average_score"] is not None:
+            st.success(f'✅ **Average Score:** {score["average_score"]}\n\n📌 **Total Questions:** {score["question_count"]} ({score["follow_ups"]} follow-ups)\n\n🏆 **Total Score:** {score["total_score"]} / {score["max_score"]}')
+        else:
+            st.info("No scored answers for this candidate yet.")
         
         # Fetch interview document
-        document = interviews_collection.find_one({"candidate_id": candidate_id})
+        document = get_storage().get_interview(candidate_id)
         
         if document:
             st.subheader(f"📝 Candidate: {document['candidate_id']}")
@@ -1,10 +1,9 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import base64
-import os
 from datetime import datetime
-from pathlib import Path
 import logging
+from src.storage import get_storage
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -16,10 +15,6 @@ if 'candidate_id' not in st.session_state:
 
 candidate_id = st.session_state.candidate_id
 
-# Set up save directory
-SAVE_DIR = Path(__file__).parent.parent / "saved_diagrams"
-os.makedirs(SAVE_DIR, exist_ok=True)
-
 # Streamlit setup
 st.set_page_config(page_title="System Design Editor", layout="wide")
 st.title("🖋️ System Architecture Design")
@@ -90,7 +85,6 @@ if st.button("Complete Design"):
     if component_value and isinstance(component_value, dict) and 'data' in component_value:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"system_design_{candidate_id}_{timestamp}.png"
-        filepath = SAVE_DIR / filename
         
         try:
             # Save the PNG data
@@ -98,11 +92,11 @@ if st.button("Complete Design"):
             if png_data.startswith('data:image/png;base64,'):
                 png_data = png_data.split(',')[1]
             
-            with open(filepath, 'wb') as f:
-                f.write(base64.b64decode(png_data))
+            png_bytes = base64.b64decode(png_data)
+            get_storage().save_diagram(candidate_id, filename, png_bytes)
             
             st.success(f"✅ Design saved successfully as {filename}")
-            st.image(filepath, caption="Your System Design")
+            st.image(png_bytes, caption="Your System Design")
             
             # Add complete interview button
             if st.button("Complete Interview"):
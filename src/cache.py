@@ -0,0 +1,284 @@
+# Response caching for LLM calls
+#
+# Two tiers: a bounded in-process LRU with a TTL, backed by an optional Mongo
+# collection whose TTL index lets the server expire old entries. Keys are a
+# hash of the prompt template plus the normalised inputs, so editing a prompt
+# naturally invalidates everything cached for it.
+#
+# The Mongo tier must never cost more than it saves: each operation has a short
+# client-side timeout (EVAL_CACHE_MONGO_TIMEOUT) instead of the 5 s server
+# selection wait, and after an error the tier is skipped for
+# EVAL_CACHE_MONGO_BACKOFF seconds, so an outage does not slow every evaluation.
+
+import asyncio
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import pymongo
+from src.db import get_db
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different resubmissions share a key.
+
+    Case is kept: in code and identifiers `Foo` and `foo` mean different things.
+    """
+    return " ".join(str(text).split())
+
+
+def make_key(template, *parts):
+    h = hashlib.sha256()
+    h.update(template.encode("utf-8"))
+    for part in parts:
+        h.update(b"\x00")
+        h.update(normalize_text(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU where every entry also expires after `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MongoCache:
+    """Second tier stored in a Mongo collection with a TTL index on `created_at`."""
+
+    def __init__(self, collection_name, ttl=86400, db_name=None, timeout=0.5):
+        self.collection_name = collection_name
+        self.db_name = db_name
+        self.ttl = ttl
+        self.timeout = timeout
+        self._collection = None
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    collection = get_db(self.db_name)[self.collection_name]
+                    collection.create_index("created_at", expireAfterSeconds=self.ttl)
+                    self._collection = collection
+        return self._collection
+
+    def get(self, key, default=MISSING):
+        with pymongo.timeout(self.timeout):
+            doc = self.collection.find_one({"_id": key})
+        if not doc:
+            return default
+        # The TTL monitor only runs about once a minute, so check expiry here too
+        created_at = doc["created_at"].replace(tzinfo=timezone.utc)
+        if created_at + timedelta(seconds=self.ttl) < datetime.now(timezone.utc):
+            return default
+        return doc["value"], doc.get("latency", 0.0)
+
+    def set(self, key, value, latency):
+        with pymongo.timeout(self.timeout):
+            self.collection.update_one(
+                {"_id": key},
+                {"$set": {"value": value, "latency": latency, "created_at": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+
+
+class ResponseCache:
+    """LRU + optional Mongo cache with hit/miss and saved-latency accounting."""
+
+    def __init__(self, name, maxsize=1024, ttl=3600, mongo=None, enabled=True, mongo_backoff=30.0):
+        self.name = name
+        self.enabled = enabled
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.mongo = mongo
+        self.mongo_backoff = mongo_backoff
+        self._mongo_retry_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "misses": 0,
+            "mongo_errors": 0,
+            "mongo_skipped": 0,
+            "saved_seconds": 0.0,
+            "compute_seconds": 0.0,
+        }
+
+    def _count(self, field, amount=1):
+        with self._lock:
+            self._stats[field] += amount
+
+    def _mongo_ready(self):
+        """True if the Mongo tier is configured and not backing off after an error."""
+        if self.mongo is None:
+            return False
+        if time.monotonic() < self._mongo_retry_at:
+            self._count("mongo_skipped")
+            return False
+        return True
+
+    def _mongo_failed(self, action, error):
+        self._mongo_retry_at = time.monotonic() + self.mongo_backoff
+        logger.warning("%s: Mongo cache %s failed, skipping it for %.0fs: %s",
+                       self.name, action, self.mongo_backoff, error)
+        self._count("mongo_errors")
+
+    def _lookup_memory(self, key):
+        item = self.memory.get(key)
+        if item is MISSING:
+            return MISSING
+        value, latency = item
+        self._count("memory_hits")
+        self._count("saved_seconds", latency)
+        return copy.deepcopy(value)
+
+    def _lookup_mongo(self, key):
+        try:
+            item = self.mongo.get(key)
+        except PyMongoError as e:
+            self._mongo_failed("read", e)
+            return MISSING
+        if item is MISSING:
+            return MISSING
+        value, latency = item
+        self.memory.set(key, (value, latency))
+        self._count("mongo_hits")
+        self._count("saved_seconds", latency)
+        return copy.deepcopy(value)
+
+    def lookup(self, key):
+        """Return the cached value or MISSING, recording the hit or miss."""
+        if not self.enabled:
+            return MISSING
+        value = self._lookup_memory(key)
+        if value is MISSING and self._mongo_ready():
+            value = self._lookup_mongo(key)
+        if value is MISSING:
+            self._count("misses")
+        return value
+
+    async def alookup(self, key):
+        """Async lookup; only the Mongo tier is pushed onto a worker thread."""
+        if not self.enabled:
+            return MISSING
+        value = self._lookup_memory(key)
+        if value is MISSING and self._mongo_ready():
+            value = await asyncio.to_thread(self._lookup_mongo, key)
+        if value is MISSING:
+            self._count("misses")
+        return value
+
+    def store(self, key, value, latency):
+        if not self.enabled:
+            return
+        self._count("compute_seconds", latency)
+        self.memory.set(key, (copy.deepcopy(value), latency))
+        if self._mongo_ready():
+            try:
+                self.mongo.set(key, value, latency)
+            except PyMongoError as e:
+                self._mongo_failed("write", e)
+
+    def get_or_compute(self, key, compute):
+        value = self.lookup(key)
+        if value is not MISSING:
+            return value
+        start = time.perf_counter()
+        value = compute()
+        self.store(key, value, time.perf_counter() - start)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        """Like get_or_compute, for a coroutine function `compute`."""
+        value = await self.alookup(key)
+        if value is not MISSING:
+            return value
+        start = time.perf_counter()
+        value = await compute()
+        latency = time.perf_counter() - start
+        if self.mongo is not None:
+            await asyncio.to_thread(self.store, key, value, latency)
+        else:
+            self.store(key, value, latency)
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["mongo_hits"]
+        total = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["llm_calls_saved"] = hits
+        stats["hit_rate"] = round(hits / total, 4) if total else 0.0
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        stats["compute_seconds"] = round(stats["compute_seconds"], 3)
+        stats["memory_entries"] = len(self.memory)
+        stats["enabled"] = self.enabled
+        return stats
+
+    def clear(self):
+        self.memory.clear()
+
+
+def _build_evaluation_cache():
+    ttl = int(os.getenv("EVAL_CACHE_TTL", "86400"))
+    mongo = None
+    if os.getenv("MONGO_URI") and os.getenv("EVAL_CACHE_MONGO", "1") == "1":
+        mongo = MongoCache("evaluation_cache", ttl=ttl, timeout=float(os.getenv("EVAL_CACHE_MONGO_TIMEOUT", "0.5")))
+    return ResponseCache(
+        "evaluation_cache",
+        maxsize=int(os.getenv("EVAL_CACHE_SIZE", "1024")),
+        ttl=ttl,
+        mongo=mongo,
+        enabled=os.getenv("EVAL_CACHE_ENABLED", "1") == "1",
+        mongo_backoff=float(os.getenv("EVAL_CACHE_MONGO_BACKOFF", "30")),
+    )
+
+
+evaluation_cache = _build_evaluation_cache()
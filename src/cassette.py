@@ -0,0 +1,258 @@
+# Record/replay cassettes for LLM calls
+#
+# Live model output and latency vary from run to run, so prompt or chain
+# changes cannot be perf-tested consistently. With a cassette configured, every
+# compiled chain (see src.chains) records or replays the `prompt | llm` step:
+#
+#   LLM_CASSETTE=cassettes/session.jsonl.gz LLM_CASSETTE_MODE=record   # live LLM, capture calls
+#   LLM_CASSETTE=cassettes/session.jsonl.gz                            # replay, no LLM at all
+#
+# One JSON line per call: operation, prompt template hash, chain inputs, raw
+# LLM output (before parsing, so parsers still run on replay), total latency
+# and time to first chunk. Paths ending in .gz are gzip-compressed. Replay
+# sleeps for the recorded latency times LLM_CASSETTE_LATENCY_SCALE (0 = no
+# sleeping) and raises CassetteMissError for calls that were never recorded.
+
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(LookupError):
+    """A replayed chain call has no recording in the cassette."""
+
+
+def prompt_hash(template):
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+def call_key(template_hash, inputs):
+    payload = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(f"{template_hash}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _text(output):
+    return output.content if hasattr(output, "content") else str(output)
+
+
+class Cassette:
+    def __init__(self, path, mode=REPLAY, latency_scale=1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries = defaultdict(list)
+        self._served = defaultdict(int)
+        self.counts = {"recorded": 0, "replayed": 0, "misses": 0}
+        if mode == REPLAY:
+            self._load()
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def _load(self):
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+        logger.info("Loaded %d recorded LLM calls from %s", sum(map(len, self._entries.values())), self.path)
+
+    def record(self, entry):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = _open(self.path, "a")
+                atexit.register(self.close)
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._file.flush()
+            self.counts["recorded"] += 1
+
+    def lookup(self, key, operation):
+        """Next recording for `key`; repeated calls cycle through repeated recordings."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.counts["misses"] += 1
+                raise CassetteMissError(f"No recorded '{operation}' call with key {key[:12]} in {self.path}")
+            entry = entries[self._served[key] % len(entries)]
+            self._served[key] += 1
+            self.counts["replayed"] += 1
+        return entry
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            return {"path": self.path, "mode": self.mode, "latency_scale": self.latency_scale, **self.counts}
+
+
+class CassetteStep(Runnable):
+    """Records or replays the `prompt | llm` part of a chain; input is the chain's input dict."""
+
+    def __init__(self, cassette, template, operation, generate=None):
+        self.cassette = cassette
+        self.template_hash = prompt_hash(template)
+        self.operation = operation
+        self.generate = generate
+
+    def _entry(self, inputs, output, message, latency, ttft):
+        return {
+            "key": call_key(self.template_hash, inputs),
+            "operation": self.operation,
+            "prompt_hash": self.template_hash,
+            "inputs": inputs,
+            "output": output,
+            "message": message,
+            "latency": round(latency, 4),
+            "ttft": round(ttft, 4),
+        }
+
+    def _replay(self, inputs):
+        return self.cassette.lookup(call_key(self.template_hash, inputs), self.operation)
+
+    @staticmethod
+    def _result(entry):
+        return AIMessage(content=entry["output"]) if entry["message"] else entry["output"]
+
+    @staticmethod
+    def _pieces(entry, words=4):
+        parts = entry["output"].split(" ")
+        pieces = [" ".join(parts[i:i + words]) + " " for i in range(0, len(parts), words)]
+        pieces[-1] = pieces[-1][:-1]
+        if entry["message"]:
+            return [AIMessageChunk(content=p) for p in pieces]
+        return pieces
+
+    def _delays(self, entry, pieces):
+        scale = self.cassette.latency_scale
+        rest = max(0.0, entry["latency"] - entry["ttft"]) * scale
+        return entry["ttft"] * scale, rest / len(pieces)
+
+    def invoke(self, input, config=None, **kwargs):
+        if self.cassette.replaying:
+            entry = self._replay(input)
+            time.sleep(entry["latency"] * self.cassette.latency_scale)
+            return self._result(entry)
+        start = time.perf_counter()
+        output = self.generate.invoke(input, config, **kwargs)
+        latency = time.perf_counter() - start
+        self.cassette.record(self._entry(input, _text(output), hasattr(output, "content"), latency, latency))
+        return output
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        if self.cassette.replaying:
+            entry = self._replay(input)
+            await asyncio.sleep(entry["latency"] * self.cassette.latency_scale)
+            return self._result(entry)
+        start = time.perf_counter()
+        output = await self.generate.ainvoke(input, config, **kwargs)
+        latency = time.perf_counter() - start
+        self.cassette.record(self._entry(input, _text(output), hasattr(output, "content"), latency, latency))
+        return output
+
+    def stream(self, input, config=None, **kwargs):
+        if self.cassette.replaying:
+            entry = self._replay(input)
+            pieces = self._pieces(entry)
+            first, each = self._delays(entry, pieces)
+            time.sleep(first)
+            for piece in pieces:
+                yield piece
+                time.sleep(each)
+            return
+        start, ttft, parts, message = time.perf_counter(), None, [], False
+        for chunk in self.generate.stream(input, config, **kwargs):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            message = hasattr(chunk, "content")
+            parts.append(_text(chunk))
+            yield chunk
+        latency = time.perf_counter() - start
+        self.cassette.record(self._entry(input, "".join(parts), message, latency, ttft or latency))
+
+    async def astream(self, input, config=None, **kwargs):
+        if self.cassette.replaying:
+            entry = self._replay(input)
+            pieces = self._pieces(entry)
+            first, each = self._delays(entry, pieces)
+            await asyncio.sleep(first)
+            for piece in pieces:
+                yield piece
+                await asyncio.sleep(each)
+            return
+        start, ttft, parts, message = time.perf_counter(), None, [], False
+        async for chunk in self.generate.astream(input, config, **kwargs):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            message = hasattr(chunk, "content")
+            parts.append(_text(chunk))
+            yield chunk
+        latency = time.perf_counter() - start
+        self.cassette.record(self._entry(input, "".join(parts), message, latency, ttft or latency))
+
+
+_cassette = None
+_configured = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """The cassette configured by LLM_CASSETTE / LLM_CASSETTE_MODE, or None."""
+    global _cassette, _configured
+    if not _configured:
+        with _cassette_lock:
+            if not _configured:
+                path = os.getenv("LLM_CASSETTE")
+                if path:
+                    _cassette = Cassette(path, os.getenv("LLM_CASSETTE_MODE", REPLAY),
+                                         float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0")))
+                _configured = True
+    return _cassette
+
+
+def use_cassette(path, mode=REPLAY, latency_scale=1.0):
+    """Switch cassettes at runtime (None to turn them off); compiled chains are rebuilt."""
+    global _cassette, _configured
+    from src.chains import clear_chains
+
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+        _cassette = Cassette(path, mode, latency_scale) if path else None
+        _configured = True
+    clear_chains()
+    return _cassette
+
+
+def cassette_stats():
+    return _cassette.stats() if _cassette is not None else None
@@ -0,0 +1,81 @@
+# Precompiled chain registry
+#
+# Building a PromptTemplate parses the whole prompt string, and the prompts in
+# src/prompt.py are long. Chains are therefore compiled once per (prompt
+# content, parser, LLM) and reused, so a custom `prompt=` argument still gets
+# its own chain while the default prompts are never re-parsed.
+
+import threading
+
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from src.cassette import CassetteStep, get_cassette
+from src.llm import get_llm
+from src.ratelimit import GuardedLLM
+from src.tokens import token_usage_handler
+
+PARSERS = {
+    None: lambda: None,
+    "json": JsonOutputParser,
+    "text": StrOutputParser,
+}
+
+# Only a handful of prompts exist; the cap just guards against unbounded
+# growth if callers pass many distinct custom prompts
+MAX_CHAINS = 256
+
+_chains = {}
+_lock = threading.Lock()
+
+
+def compile_chain(prompt, input_variables, parser=None, llm=None, operation="llm"):
+    """Build `prompt | llm [| parser]` without caching.
+
+    Every chain reports token usage under `operation` (see src.tokens) and
+    calls its LLM through the shared rate limiter / circuit breaker. With a
+    cassette configured (see src.cassette) the `prompt | llm` step is recorded,
+    or replayed without touching an LLM.
+    """
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        chain = CassetteStep(cassette, prompt, operation)
+    else:
+        llm = llm or get_llm()
+        if not getattr(llm, "guards_backends", False):
+            llm = GuardedLLM(llm)
+        chain = PromptTemplate(template=prompt, input_variables=list(input_variables)) | llm
+        if cassette is not None:
+            chain = CassetteStep(cassette, prompt, operation, generate=chain)
+    output_parser = PARSERS[parser]()
+    if output_parser is not None:
+        chain = chain | output_parser
+    return chain.with_config(callbacks=[token_usage_handler], metadata={"operation": operation})
+
+
+def get_chain(prompt, input_variables, parser=None, operation="llm"):
+    """Return the compiled chain for this prompt text, building it on first use.
+
+    `parser` is a key of PARSERS ("json", "text" or None). If the active LLM changes
+    (e.g. after reset_llm) the chain is rebuilt against the new client.
+    """
+    cassette = get_cassette()
+    llm = None if cassette is not None and cassette.replaying else get_llm()
+    # Keyed on the prompt content itself: str caches its hash, so a lookup
+    # never rehashes the long prompt, and equal custom prompts share a chain
+    key = (prompt, tuple(input_variables), parser, operation)
+    entry = _chains.get(key)
+    if entry is None or entry[0] is not llm:
+        with _lock:
+            entry = _chains.get(key)
+            if entry is None or entry[0] is not llm:
+                entry = (llm, compile_chain(prompt, input_variables, parser, llm, operation))
+                if key not in _chains and len(_chains) >= MAX_CHAINS:
+                    _chains.pop(next(iter(_chains)))
+                _chains[key] = entry
+    return entry[1]
+
+
+def clear_chains():
+    with _lock:
+        _chains.clear()
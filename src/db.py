@@ -0,0 +1,74 @@
+# Process-wide MongoDB clients
+#
+# A MongoClient owns a connection pool, and building one costs a DNS/SRV
+# lookup, a TLS handshake and server discovery. Helpers used to build a fresh
+# client on every call; now every caller shares one lazily created client per
+# process (and one AsyncMongoClient for the FastAPI routes), tuned by:
+#
+#   MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_MS,
+#   MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_DB
+#
+# Data access goes through src.repository rather than raw collections.
+
+import os
+import threading
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+DEFAULT_DB = os.getenv("MONGO_DB", "aieta")
+
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def client_options():
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_MS", "300000")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "appname": "aieta",
+    }
+
+
+def get_client():
+    """The shared MongoClient, created on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = MongoClient(os.getenv("MONGO_URI"), **client_options())
+    return _client
+
+
+def get_async_client():
+    """The shared AsyncMongoClient; only use it from the event loop it was created on."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                from pymongo import AsyncMongoClient
+                _async_client = AsyncMongoClient(os.getenv("MONGO_URI"), **client_options())
+    return _async_client
+
+
+def get_db(name=None):
+    return get_client()[name or DEFAULT_DB]
+
+
+def get_async_db(name=None):
+    return get_async_client()[name or DEFAULT_DB]
+
+
+def close_clients():
+    """Close both clients; the next call creates fresh ones."""
+    global _client, _async_client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        # AsyncMongoClient.close() is a coroutine; dropping the reference is enough at shutdown
+        _client, _async_client = None, None
@@ -0,0 +1,273 @@
+# Bulk export of interviews for hiring analytics
+#
+# One row per answer: every interaction, plus its follow_up_1 / follow_up_2,
+# joined with the candidate's latest template (email, version, questions
+# planned) and coding-submission totals:
+#
+#   python -m src.export interviews.parquet --row-group-size 50000
+#   python -m src.export interviews.csv --candidate-id JOHDOE-20241013151130
+#
+# The same rows are served as a download by GET /export/interviews.
+#
+# Memory stays flat however large the collections are. Interviews, templates
+# and coding submissions are read through the storage backend (src.storage) as
+# batched streams sorted by candidate_id (each served by its candidate index)
+# and merge-joined as they stream, so nothing is looked up per row or held per
+# candidate. CSV is written row by row, and Parquet one row group at a time.
+
+import argparse
+import csv
+import io
+import itertools
+import logging
+import time
+
+from src.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+FOLLOW_UP_KEYS = ("follow_up_1", "follow_up_2")
+COLUMNS = [
+    "interview_id", "candidate_id", "candidate_email", "template_version", "questions_planned",
+    "status", "started_at", "completed_at",
+    "question_number", "interaction_id", "answer_kind", "question", "answer", "score", "feedback",
+    "coding_submissions", "last_coding_submission_at",
+]
+FORMATS = ("csv", "parquet")
+
+
+# 1. Rows
+
+def _per_candidate(cursor, summarize):
+    """(candidate_id, summary) for a cursor sorted by candidate_id, one group in memory at a time."""
+    for candidate_id, group in itertools.groupby(cursor, key=lambda doc: doc.get("candidate_id")):
+        if isinstance(candidate_id, str):
+            yield candidate_id, summarize(group)
+
+
+class _MergeJoin:
+    """Look up summaries from a candidate_id-ordered stream, for keys requested in ascending order."""
+
+    def __init__(self, pairs):
+        self._pairs = iter(pairs)
+        self._current = next(self._pairs, None)
+
+    def get(self, candidate_id):
+        while self._current is not None and self._current[0] < candidate_id:
+            self._current = next(self._pairs, None)
+        if self._current is not None and self._current[0] == candidate_id:
+            return self._current[1]
+        return {}
+
+
+def _latest_template(group):
+    latest = next(group)
+    return {
+        "candidate_email": latest.get("candidate_email"),
+        "template_version": latest.get("version"),
+        "questions_planned": latest.get("question_count"),
+    }
+
+
+def _coding_totals(group):
+    # Newest first, so the first timestamp is the latest
+    first = next(group)
+    return {"coding_submissions": 1 + sum(1 for _ in group), "last_coding_submission_at": first.get("timestamp")}
+
+
+def _answer_row(base, number, interaction, kind, answer):
+    feedback = answer.get("feedback")
+    if isinstance(feedback, list):
+        feedback = "\n".join(str(item) for item in feedback)
+    score = answer.get("score")
+    return {
+        **base,
+        "question_number": number,
+        "interaction_id": interaction.get("id"),
+        "answer_kind": kind,
+        "question": answer.get("question"),
+        "answer": answer.get("answer"),
+        "score": float(score) if isinstance(score, (int, float)) and not isinstance(score, bool) else None,
+        "feedback": feedback,
+    }
+
+
+def _primed(stream):
+    """`stream` with its first item already fetched, so query errors are raised now."""
+    stream = iter(stream)
+    first = next(stream, None)
+    return stream if first is None else itertools.chain([first], stream)
+
+
+def iter_rows(candidate_id=None, batch_size=1000, storage=None):
+    """One flat dict (keys: COLUMNS) per answer, follow-ups included.
+
+    Each storage stream fetches its first batch here, before any row is
+    pulled, so a backend without bulk reads (NotImplementedError) or a failing
+    query raises up front rather than partway through a download.
+    """
+    storage = storage or get_storage()
+    interviews = _primed(storage.iter_interviews(candidate_id, batch_size))
+    templates = _primed(storage.iter_templates(candidate_id, batch_size))
+    submissions = _primed(storage.iter_coding_submissions(candidate_id, batch_size))
+    return _rows(interviews, _MergeJoin(_per_candidate(templates, _latest_template)),
+                 _MergeJoin(_per_candidate(submissions, _coding_totals)))
+
+
+def _rows(interviews, template_info, coding_info):
+    for interview in interviews:
+        cid = interview.get("candidate_id")
+        if not isinstance(cid, str):
+            continue
+        base = dict.fromkeys(COLUMNS)
+        base.update({
+            "interview_id": str(interview["_id"]),
+            "candidate_id": cid,
+            "status": interview.get("status"),
+            "started_at": interview.get("started_at"),
+            "completed_at": interview.get("completed_at"),
+            **template_info.get(cid),
+            **coding_info.get(cid),
+        })
+        for number, interaction in enumerate(interview.get("interactions") or [], start=1):
+            yield _answer_row(base, number, interaction, "question", interaction)
+            for key in FOLLOW_UP_KEYS:
+                if isinstance(interaction.get(key), dict):
+                    yield _answer_row(base, number, interaction, key, interaction[key])
+
+
+# 2. Writers
+
+def _csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def csv_chunks(rows, rows_per_chunk=1000):
+    """CSV text (header first) in chunks of `rows_per_chunk` rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for i, row in enumerate(rows, start=1):
+        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        if i % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _schema():
+    import pyarrow as pa
+
+    timestamp = pa.timestamp("ms", tz="UTC")
+    types = {
+        "template_version": pa.int64(), "questions_planned": pa.int64(), "question_number": pa.int64(),
+        "score": pa.float64(), "coding_submissions": pa.int64(),
+        "started_at": timestamp, "completed_at": timestamp, "last_coding_submission_at": timestamp,
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in COLUMNS])
+
+
+class _Sink:
+    """Write-only file object whose bytes are drained after each row group."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_chunks(rows, row_group_size=50000, sink=None):
+    """Parquet bytes, one row group at a time (the footer comes last).
+
+    With a file `sink` the bytes go there instead and nothing is yielded
+    except empty markers, one per row group written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _schema()
+    out = sink or _Sink()
+    writer = pq.ParquetWriter(out, schema, compression="zstd")
+    try:
+        for batch in iter(lambda: list(itertools.islice(rows, row_group_size)), []):
+            columns = {name: [row[name] for row in batch] for name in COLUMNS}
+            writer.write_table(pa.table(columns, schema=schema))
+            yield out.drain() if sink is None else b""
+    finally:
+        writer.close()
+    if sink is None:
+        yield out.drain()
+
+
+def export(path, fmt=None, candidate_id=None, batch_size=1000, row_group_size=50000):
+    """Write every answer row to `path` (format from the extension unless given); returns stats."""
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Available: {FORMATS}")
+
+    stats = {"rows": 0}
+    started = time.perf_counter()
+
+    def counted(rows):
+        for row in rows:
+            stats["rows"] += 1
+            if stats["rows"] % 100000 == 0:
+                logger.info("%d rows - %.0f rows/sec", stats["rows"], stats["rows"] / (time.perf_counter() - started))
+            yield row
+
+    rows = counted(iter_rows(candidate_id, batch_size))
+    if fmt == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in csv_chunks(rows):
+                f.write(chunk)
+    else:
+        with open(path, "wb") as f:
+            for _ in parquet_chunks(rows, row_group_size, sink=f):
+                pass
+
+    elapsed = time.perf_counter() - started
+    stats["format"] = fmt
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export interview answers as Parquet or CSV")
+    parser.add_argument("path", help="output file; .parquet writes Parquet, anything else CSV")
+    parser.add_argument("--format", choices=FORMATS, help="override the format implied by the extension")
+    parser.add_argument("--candidate-id", help="export one candidate only")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per cursor batch")
+    parser.add_argument("--row-group-size", type=int, default=50000, help="rows per Parquet row group")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
+    stats = export(args.path, args.format, args.candidate_id, args.batch_size, args.row_group_size)
+    logger.info("Done: %s", stats)
+
+
+if __name__ == "__main__":
+    main()
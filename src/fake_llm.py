@@ -0,0 +1,178 @@
+# Offline fake LLM
+#
+# A drop-in provider for benchmarks and local runs without a network or an
+# API budget:
+#
+#   LLM_PROVIDER=fake uvicorn api:app
+#
+# It recognises the prompts in src.prompt and answers with schema-valid output:
+# an `interview` JSON for question generation, an `evaluation` JSON for answer
+# scoring, plain text for follow-ups and code execution. Content is derived
+# from a hash of the prompt, so the same input always gets the same answer.
+# Latency and failures are drawn from a seeded RNG (FAKE_LLM_* env vars), so a
+# run is reproducible too.
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import PrivateAttr
+
+QUESTION_TOPICS = [
+    "the bias-variance trade-off", "feature scaling", "cross-validation",
+    "regularisation in linear models", "gradient boosting", "attention in transformers",
+    "deploying a model to production", "debugging a model that stopped improving",
+    "a disagreement with a stakeholder about metrics", "how you keep learning new tools",
+]
+
+FEEDBACK = [
+    "The answer identifies the core idea correctly.",
+    "A concrete example from a real project would make it more convincing.",
+    "The explanation skips over how the approach would be validated.",
+    "Trade-offs are mentioned but not weighed against each other.",
+    "The terminology is used accurately and clearly.",
+]
+
+
+class FakeLLMError(RuntimeError):
+    """Simulated provider failure."""
+
+
+class FakeInterviewLLM(LLM):
+    """Deterministic stand-in for the interview LLM.
+
+    latency: "fixed" sleeps `latency_mean`; "uniform" draws from
+    mean +/- jitter; "lognormal" (default) has median `latency_mean` and a
+    long right tail controlled by `latency_sigma`.
+    """
+
+    latency_mean: float = 0.5
+    latency_jitter: float = 0.2
+    latency_sigma: float = 0.5
+    latency_dist: str = "lognormal"
+    failure_rate: float = 0.0
+    seed: int = 0
+    chunk_words: int = 3
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self):
+        return "fake-interview"
+
+    @property
+    def _identifying_params(self):
+        return {"latency_mean": self.latency_mean, "latency_dist": self.latency_dist,
+                "failure_rate": self.failure_rate, "seed": self.seed}
+
+    # -- behaviour ------------------------------------------------------------
+
+    def _plan(self):
+        """Draw (latency seconds, should fail) for one call."""
+        with self._rng_lock:
+            if self.latency_dist == "fixed":
+                latency = self.latency_mean
+            elif self.latency_dist == "uniform":
+                latency = self._rng.uniform(self.latency_mean - self.latency_jitter,
+                                            self.latency_mean + self.latency_jitter)
+            else:
+                latency = self._rng.lognormvariate(0, self.latency_sigma) * self.latency_mean
+            fail = self._rng.random() < self.failure_rate
+        return max(0.0, latency), fail
+
+    def respond(self, prompt):
+        """The deterministic completion for `prompt`."""
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        if '"interview"' in prompt:
+            name = _field(prompt, "Name:") or "there"
+            questions = [f"Question {i + 1}: How would you explain {topic}?" for i, topic in enumerate(QUESTION_TOPICS)]
+            return json.dumps({"interview": {
+                "greeting_script": f"Hello {name}, thanks for joining us today. Your project work really stood out.",
+                "questions": questions,
+            }}, indent=2)
+        if '"evaluation"' in prompt:
+            return json.dumps({"evaluation": {
+                "score": rng.randint(3, 9),
+                "feedback": rng.sample(FEEDBACK, 2),
+            }}, indent=2)
+        if "Act as a Python compiler" in prompt:
+            return str(rng.randint(0, 100))
+        topic = rng.choice(QUESTION_TOPICS)
+        return f"That is a good start. What was the hardest part of applying {topic} in practice, and how did you handle it?"
+
+    # -- LLM interface ----------------------------------------------------------
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        latency, fail = self._plan()
+        time.sleep(latency)
+        if fail:
+            raise FakeLLMError("fake LLM: simulated provider failure")
+        return self.respond(prompt)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        latency, fail = self._plan()
+        await asyncio.sleep(latency)
+        if fail:
+            raise FakeLLMError("fake LLM: simulated provider failure")
+        return self.respond(prompt)
+
+    def _chunks(self, prompt):
+        words = self.respond(prompt).split(" ")
+        for i in range(0, len(words), self.chunk_words):
+            text = " ".join(words[i:i + self.chunk_words])
+            yield text if i + self.chunk_words >= len(words) else text + " "
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        # A third of the latency before the first token, the rest spread over the chunks
+        latency, fail = self._plan()
+        chunks = list(self._chunks(prompt))
+        time.sleep(latency / 3)
+        if fail:
+            raise FakeLLMError("fake LLM: simulated provider failure")
+        for text in chunks:
+            time.sleep(latency * 2 / 3 / len(chunks))
+            if run_manager:
+                run_manager.on_llm_new_token(text)
+            yield GenerationChunk(text=text)
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        latency, fail = self._plan()
+        chunks = list(self._chunks(prompt))
+        await asyncio.sleep(latency / 3)
+        if fail:
+            raise FakeLLMError("fake LLM: simulated provider failure")
+        for text in chunks:
+            await asyncio.sleep(latency * 2 / 3 / len(chunks))
+            if run_manager:
+                await run_manager.on_llm_new_token(text)
+            yield GenerationChunk(text=text)
+
+
+def _field(prompt, label):
+    for line in prompt.splitlines():
+        if line.startswith(label):
+            return line[len(label):].strip()
+    return None
+
+
+def build_fake_llm():
+    return FakeInterviewLLM(
+        latency_mean=float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+        latency_jitter=float(os.getenv("FAKE_LLM_LATENCY_JITTER", "0.2")),
+        latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+        latency_dist=os.getenv("FAKE_LLM_LATENCY_DIST", "lognormal"),
+        failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+        seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+    )
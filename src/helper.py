@@ -2,52 +2,54 @@
 
 import os
 from dotenv import load_dotenv
-import sounddevice as sd
-import soundfile as sf
-from scipy.io.wavfile import write
-import numpy as np
 import streamlit as st
-from pymongo import MongoClient
-from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from groq import Groq
 import threading
-import numpy as np
-from pymongo import MongoClient
-from gtts import gTTS
-import whisper
-from langchain_core.output_parsers import JsonOutputParser
 import time
 import subprocess
 load_dotenv()
 import random
-from euriai import EuriaiLangChainLLM
+import asyncio
+import queue
+import json
+import hashlib
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from src.prompt import *
-
+from src.chains import get_chain
+from src.profile import compact_candidate_profile
+from src.ratelimit import llm_priority, BATCH
+from src.metrics import instrument
+from src.parsing import (
+    OutputParseError, parse_llm_json, partial_json, count_repair, as_text,
+    validate_evaluation, validate_interview
+)
+import logging
+from src.cache import evaluation_cache, make_key, MISSING
+from src import repository
+from src.storage import get_storage
+
+
+logger = logging.getLogger(__name__)
 
 # read api key through .env
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 MONGO_URI = os.getenv("MONGO_URI")
-api_key = os.getenv('EURON_API_KEY')
-
+EVAL_BATCH_CONCURRENCY = int(os.getenv("EVAL_BATCH_CONCURRENCY", "5"))
+# Answers scoring below this get a follow-up question
+FOLLOW_UP_THRESHOLD = 6
+# Start follow-up generation alongside the evaluation instead of after it
+SPECULATIVE_FOLLOW_UP = os.getenv("SPECULATIVE_FOLLOW_UP", "0") == "1"
 
-# intialtize the LLM models
-# client = Groq(api_key=GROQ_API_KEY)
-# llm = ChatGroq(model="llama-3.1-8b-instant",temperature=0)
-llm = EuriaiLangChainLLM(api_key=api_key,model="gpt-4.1-nano")
 
-print(llm.invoke("Write a poem about time travel."))
+# The LLM client is built lazily by src.llm on first use (see LLM_PROVIDER);
+# audio libraries (sounddevice, whisper, gTTS, ...) are imported inside the
+# functions that need them so importing this module stays cheap.
 
 # 1. Preprocessing Steps
 
 ## 1.1 Extract Information of Candidate
 
 def extract_candidate_info():
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client['aieta']
-    candidates_collection = db['candidates']
-    
-    candidate_data = candidates_collection.find_one()
+    candidate_data = repository.first_candidate()
     
     if candidate_data:
         candidate_info = {
@@ -60,11 +62,7 @@ def extract_candidate_info():
         return None
     
 def extract_candidate_info(candidate_id: str):
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client['aieta']
-    candidates_collection = db['candidates']
-    
-    candidate_data = candidates_collection.find_one({"_id": candidate_id})
+    candidate_data = get_storage().get_candidate(candidate_id)
     return candidate_data or {}
     
 def shuffle_candidate_data(candidate_info):
@@ -74,11 +72,28 @@ def shuffle_candidate_data(candidate_info):
 
 ## 1.2 Generate Questions Through LLM
 
+def invoke_json(prompt, input_variables, inputs, validate, response=None, operation="llm"):
+    """Invoke a text chain and parse its JSON output tolerantly (see src.parsing).
+
+    Local repairs (fences, surrounding prose, trailing commas, truncation) are
+    tried first; the LLM is asked again only once, when none of them work.
+    Pass `response` to parse output that was already received (e.g. streamed).
+    """
+    chain = get_chain(prompt, input_variables, parser="text", operation=operation)
+    try:
+        return parse_llm_json(response if response is not None else chain.invoke(inputs), validate)
+    except OutputParseError as e:
+        logger.warning("Unusable LLM output (%s), retrying once", e)
+    count_repair("llm_retry")
+    try:
+        return parse_llm_json(chain.invoke(inputs), validate)
+    except OutputParseError:
+        count_repair("failed")
+        raise
+
+@instrument("generate_questions")
 def generate_questions(candidate_data, prompt = genearte_questions_prompt):
-    prompt_template = genearte_questions_prompt
-    prompt = PromptTemplate(template=prompt_template, input_variables=['candidate_data'])
-    chain = (prompt | llm | JsonOutputParser())
-    response = chain.invoke({'candidate_data': candidate_data})
+    response = invoke_json(prompt, ['candidate_data'], {'candidate_data': compact_candidate_profile(candidate_data)}, validate_interview, operation="generate_questions")
     questions = response["interview"]["questions"]
     greeting_script = response["interview"]["greeting_script"]
     return response, questions, greeting_script
@@ -86,19 +101,33 @@ def generate_questions(candidate_data, prompt = genearte_questions_prompt):
 
 ## 1.3 Load this question into the MongoDB server
 
-def store_interview_template(candidate_data, greeting, questions):
+def template_source_hash(candidate_data, prompt=genearte_questions_prompt):
+    """Hash of the question prompt and candidate profile a template was generated from.
 
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client['aieta']
-    template_collection = db['interview_templates']
-    template_doc = {
+    A stored template whose source_hash still matches is up to date.
+    """
+    h = hashlib.sha256(prompt.encode("utf-8"))
+    h.update(json.dumps(candidate_data, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+def build_interview_template(candidate_data, greeting, questions):
+    return {
         "candidate_id": candidate_data['id'],
         'candidate_email':candidate_data['personal_information']['email'],
         "greeting_script": greeting,
-        "questions": questions
+        "questions": questions,
+        "source_hash": template_source_hash(candidate_data),
+        "created_at": datetime.now(timezone.utc)
     }
-    result = template_collection.insert_one(template_doc)
-    return print("✅ Stored interview template with ID:", result.inserted_id)
+
+def store_interview_template(candidate_data, greeting, questions):
+    template_doc = build_interview_template(candidate_data, greeting, questions)
+    version, created = get_storage().store_template(template_doc)
+    if created:
+        print("✅ Stored interview template version", version)
+    else:
+        print("Interview template unchanged, still version", version)
+    return version
 
 
 # 2 Running Interview Process
@@ -106,12 +135,7 @@ def store_interview_template(candidate_data, greeting, questions):
 ## 2.1 Grab the greetings, questions from MongoDB
 
 def get_stored_interview_template(candidate_id):
-
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client['aieta']
-    template_collection = db['interview_templates']
-    
-    template_doc = template_collection.find_one({"candidate_id": str(candidate_id)})
+    template_doc = get_storage().get_latest_template(candidate_id)
     if template_doc:
         greeting = template_doc.get("greeting_script", "")
         questions = template_doc.get("questions", [])
@@ -153,7 +177,7 @@ def run_interview(candidate_id = 'JOHDOE-20241013151130'):
             if st.button("Submit Answer"):
                 try:
                     st.write(f"📝 Your Answer: {answer_text}")
-                    evaluation = evaluate_answer(current_question, answer_text)
+                    evaluation, f1 = evaluate_with_follow_up(current_question, answer_text)
                     st.write(f"📊 Evaluation Score: {evaluation['evaluation']['score']}")
                     st.write(f"💬 Feedback: {evaluation['evaluation']['feedback']}")
 
@@ -165,12 +189,11 @@ def run_interview(candidate_id = 'JOHDOE-20241013151130'):
                     }
 
                     # Follow-up 1
-                    if evaluation["evaluation"]["score"] < 6:
-                        f1 = generate_follow_up_question(current_question, answer_text)
+                    if f1 is not None:
                         st.markdown(f"**💬 Follow-up 1:** {f1}")
                         follow_up_1_input = st.text_area("Type your answer to follow-up 1:", key=f"followup1_{st.session_state.question_index}")
                         if follow_up_1_input:
-                            eval1 = evaluate_answer(f1, follow_up_1_input)
+                            eval1, f2 = evaluate_with_follow_up(f1, follow_up_1_input)
                             interaction["follow_up_1"] = {
                                 "question": f1,
                                 "answer": follow_up_1_input,
@@ -179,8 +202,7 @@ def run_interview(candidate_id = 'JOHDOE-20241013151130'):
                             }
 
                             # Follow-up 2
-                            if eval1["evaluation"]["score"] < 6:
-                                f2 = generate_follow_up_question(f1, follow_up_1_input)
+                            if f2 is not None:
                                 st.markdown(f"**💬 Follow-up 2:** {f2}")
                                 follow_up_2_input = st.text_area("Type your answer to follow-up 2:", key=f"followup2_{st.session_state.question_index}")
                                 if follow_up_2_input:
@@ -207,6 +229,9 @@ def run_interview(candidate_id = 'JOHDOE-20241013151130'):
 # 3. Helper Functions to Run soomthly streamlit App
 
 def convert_gtts_text_to_speech(question, filename="speech.mp3"):
+    from gtts import gTTS
+    import sounddevice as sd
+    import soundfile as sf
     if not isinstance(question, str):
         raise ValueError("Input `question` must be a string.")
     tts = gTTS(text=question, lang='en', slow=False)
@@ -218,6 +243,9 @@ def convert_gtts_text_to_speech(question, filename="speech.mp3"):
 
 
 def record_until_enter(filename="recording.wav", samplerate=44100):
+    import numpy as np
+    import sounddevice as sd
+    from scipy.io.wavfile import write
     duration = 600
     audio = np.empty((int(duration * samplerate), 1), dtype='int16')
     recording = sd.rec(audio.shape[0], samplerate=samplerate, channels=1, dtype='int16')
@@ -239,24 +267,230 @@ def record_until_enter(filename="recording.wav", samplerate=44100):
     return filename
 
 def convert_whisper_speech_to_text(filepath= "recording.mp3"):
+    import whisper
     model = whisper.load_model('small')
     result = model.transcribe(filepath)
     return result["text"]
     
 
+@instrument("evaluate_answer")
 def evaluate_answer(question, answer, prompt=evaluation_prompt):
-    prompt_template = prompt
-    
-    prompt_obj = PromptTemplate(template=prompt_template, input_variables=['question', 'answer'])
-    response = (prompt_obj | llm | JsonOutputParser()).invoke({'question': question, 'answer': answer})
-    return response
-
+    # Identical (prompt, question, answer) submissions are served from the cache
+    key = make_key(prompt, question, answer)
+    return evaluation_cache.get_or_compute(key, lambda: _evaluate_answer_uncached(question, answer, prompt))
+
+def _evaluate_answer_uncached(question, answer, prompt=evaluation_prompt):
+    return invoke_json(prompt, ['question', 'answer'], {'question': question, 'answer': answer}, validate_evaluation, operation="evaluate_answer")
+
+@instrument("evaluate_answers_batch")
+def evaluate_answers_batch(items, prompt=evaluation_prompt, max_concurrency=None):
+    """Evaluate many {"question", "answer"} items concurrently.
+
+    At most `max_concurrency` evaluations are in flight at once, drawing from
+    the batch LLM budget. Results come
+    back in input order, each with either an `evaluation` or an `error`, so one
+    failed item does not sink the whole batch.
+    """
+    max_concurrency = max(1, max_concurrency or EVAL_BATCH_CONCURRENCY)
+
+    def run(index, item):
+        try:
+            with llm_priority(BATCH):
+                evaluation = evaluate_answer(item['question'], item['answer'], prompt)
+            return {"index": index, "evaluation": evaluation, "error": None}
+        except Exception as e:
+            return {"index": index, "evaluation": None, "error": str(e)}
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(items))) as pool:
+        return list(pool.map(run, range(len(items)), items))
+
+@instrument("generate_follow_up_question")
 def generate_follow_up_question(question, answer, prompt = followup_questions_prompt):
-    prompt_template = prompt
-    prompt = PromptTemplate(template=prompt_template, input_variables=['question', 'answer'])
-    response = (prompt | llm).invoke({'question': question, 'answer': answer})
+    chain = get_chain(prompt, ['question', 'answer'], operation="generate_follow_up_question")
+    response = chain.invoke({'question': question, 'answer': answer})
     return response
 
+## Speculative follow-ups
+#
+# A weak answer normally costs two back-to-back LLM calls: evaluate, then
+# generate the follow-up. In speculative mode both start together and the
+# follow-up is thrown away (cancelled if it has not started yet) when the
+# score turns out to be good enough. The counters show how often that pays off.
+
+_speculation_pool = ThreadPoolExecutor(max_workers=int(os.getenv("SPECULATION_WORKERS", "8")))
+_speculation_lock = threading.Lock()
+_speculation_stats = {"speculated": 0, "used": 0, "wasted": 0, "cancelled": 0}
+
+def _count_speculation(field):
+    with _speculation_lock:
+        _speculation_stats[field] += 1
+
+def speculation_stats():
+    with _speculation_lock:
+        stats = dict(_speculation_stats)
+    stats["hit_rate"] = round(stats["used"] / stats["speculated"], 4) if stats["speculated"] else 0.0
+    # Only speculations that actually ran spent tokens
+    stats["wasted_llm_calls"] = stats["wasted"]
+    return stats
+
+@instrument("evaluate_with_follow_up")
+def evaluate_with_follow_up(question, answer, speculative=None):
+    """Evaluate an answer and, if it scores below FOLLOW_UP_THRESHOLD, generate a follow-up.
+
+    Returns (evaluation, follow_up) where follow_up is None for good answers.
+    """
+    speculative = SPECULATIVE_FOLLOW_UP if speculative is None else speculative
+    if not speculative:
+        evaluation = evaluate_answer(question, answer)
+        if evaluation["evaluation"]["score"] < FOLLOW_UP_THRESHOLD:
+            return evaluation, generate_follow_up_question(question, answer)
+        return evaluation, None
+
+    _count_speculation("speculated")
+    future = _speculation_pool.submit(generate_follow_up_question, question, answer)
+    try:
+        evaluation = evaluate_answer(question, answer)
+    except Exception:
+        _discard_speculation(future)
+        raise
+    if evaluation["evaluation"]["score"] < FOLLOW_UP_THRESHOLD:
+        _count_speculation("used")
+        return evaluation, future.result()
+    _discard_speculation(future)
+    return evaluation, None
+
+def _discard_speculation(job, started=None):
+    """Drop an unused speculative follow-up (a Future or an asyncio Task).
+
+    Only a job stopped before its LLM call began counts as "cancelled"; one that
+    finished or was in flight (`started` set) was paid for and is "wasted". A
+    thread that already started cannot be stopped; its result is ignored.
+    """
+    in_flight = job.done() or (started is not None and started.is_set())
+    stopped = job.cancel()
+    _count_speculation("cancelled" if stopped and not in_flight else "wasted")
+
+## Streaming
+#
+# Follow-ups stream as plain text chunks. Evaluations stream as text that is
+# re-parsed as partial JSON after every chunk; the progressively more complete
+# dicts are turned into ("score", n), ("feedback", [...]) and finally
+# ("done", evaluation) events that both the SSE endpoints and the HR round page
+# consume. The final text goes through the same tolerant parser as
+# evaluate_answer.
+
+@instrument("stream_follow_up_question")
+def stream_follow_up_question(question, answer, prompt = followup_questions_prompt):
+    for chunk in get_chain(prompt, ['question', 'answer'], operation="generate_follow_up_question").stream({'question': question, 'answer': answer}):
+        yield as_text(chunk)
+
+class _EvaluationEvents:
+    """Turn partial evaluation dicts into score/feedback events."""
+
+    def __init__(self):
+        self.latest = None
+        self.score_sent = False
+        self.feedback = None
+
+    def update(self, partial):
+        evaluation = (partial or {}).get("evaluation") or {}
+        events = []
+        # A partially streamed number ("1" of "10") parses too, so the score
+        # only counts once the parser has moved on to the feedback key
+        if not self.score_sent and "score" in evaluation and "feedback" in evaluation:
+            self.score_sent = True
+            events.append(("score", evaluation["score"]))
+        feedback = evaluation.get("feedback")
+        if self.score_sent and isinstance(feedback, list) and feedback != self.feedback:
+            self.feedback = list(feedback)
+            events.append(("feedback", self.feedback))
+        return events
+
+    def finish(self, result):
+        """Final events for the validated evaluation `result`."""
+        evaluation = result["evaluation"]
+        events = []
+        if not self.score_sent:
+            events.append(("score", evaluation["score"]))
+        if evaluation["feedback"] != self.feedback:
+            events.append(("feedback", evaluation["feedback"]))
+        events.append(("done", result))
+        return events
+
+def _cached_evaluation_events(evaluation):
+    return [
+        ("score", evaluation["evaluation"]["score"]),
+        ("feedback", evaluation["evaluation"].get("feedback", [])),
+        ("done", evaluation),
+    ]
+
+@instrument("stream_evaluation")
+def stream_evaluation(question, answer, prompt=evaluation_prompt):
+    """Yield evaluation events as the model streams; results go through the evaluation cache."""
+    key = make_key(prompt, question, answer)
+    cached = evaluation_cache.lookup(key)
+    if cached is not MISSING:
+        yield from _cached_evaluation_events(cached)
+        return
+    start = time.perf_counter()
+    chain = get_chain(prompt, ['question', 'answer'], parser="text", operation="evaluate_answer")
+    events = _EvaluationEvents()
+    text = ""
+    for chunk in chain.stream({'question': question, 'answer': answer}):
+        text += chunk
+        yield from events.update(partial_json(text))
+    result = invoke_json(prompt, ['question', 'answer'], {'question': question, 'answer': answer}, validate_evaluation, response=text, operation="evaluate_answer")
+    evaluation_cache.store(key, result, time.perf_counter() - start)
+    yield from events.finish(result)
+
+class _BackgroundStream:
+    """Consume a chunk stream on the speculation pool, buffering it for a later reader.
+
+    Used for speculative follow-ups on the HR round page: the follow-up starts
+    streaming while the evaluation is still running, and is either replayed to
+    the page (use) or stopped mid-stream so it stops spending tokens (discard).
+    """
+
+    _END = object()
+
+    def __init__(self, make_stream):
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._future = _speculation_pool.submit(self._run, make_stream)
+        _count_speculation("speculated")
+
+    def _run(self, make_stream):
+        stream = make_stream()
+        try:
+            for chunk in stream:
+                if self._stop.is_set():
+                    break
+                self._queue.put(chunk)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            stream.close()
+            self._queue.put(self._END)
+
+    def use(self):
+        _count_speculation("used")
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def discard(self):
+        self._stop.set()
+        _discard_speculation(self._future)
+
+def start_speculative_follow_up_stream(question, answer):
+    return _BackgroundStream(lambda: stream_follow_up_question(question, answer))
+
 def convert_wav_to_mp3(wav_path, output_dir="output"):
     os.makedirs(output_dir, exist_ok=True)
     mp3_path = os.path.join(output_dir, os.path.splitext(os.path.basename(wav_path))[0] + ".mp3")
@@ -264,32 +498,159 @@ def convert_wav_to_mp3(wav_path, output_dir="output"):
     return mp3_path
 
 
+def record_interaction(interview_id, candidate_id, interaction):
+    """Persist one finished answer (idempotent on interaction["id"]) and refresh the score summary."""
+    return get_storage().append_interaction(interview_id, candidate_id, interaction)
+
+def record_follow_up(interview_id, candidate_id, interaction_id, key, follow_up):
+    get_storage().set_interaction_field(interview_id, candidate_id, interaction_id, key, follow_up)
+
+def complete_interview(interview_id, candidate_id):
+    get_storage().complete_interview(interview_id, candidate_id)
+
 def get_candidate_average_score(candidate_id):
-    mongo_client = MongoClient(MONGO_URI)
-    db = mongo_client['aieta']
-    collection = db['interviews']
-    
-    interview = collection.find_one({'candidate_id': candidate_id})
-    if not interview:
-        return None
-    
-    scores = [
-        interaction['score'] 
-        for interaction in interview.get('interactions', []) 
-        if 'score' in interaction
-    ]
-    
-    total_scores = sum(scores)
-    length_scores = len(scores)
-    avg_score= total_scores/ length_scores
-    if scores:
-        return  avg_score, length_scores*10, total_scores
-    else:
-        return None
+    """Score summary (see src.scores), follow-up answers included.
+
+    Returns a dict with average_score, total_score, max_score, scored_answers,
+    question_count, follow_ups and per-question scores, or None when the
+    candidate has no interview. average_score is None if nothing was scored.
+    """
+    return get_storage().get_candidate_score(candidate_id)
 
 
+@instrument("code_executor")
 def code_executor(code,problem, prompt=code_executor_prompt):
-    prompt_template = prompt
-    prompt = PromptTemplate(template=prompt_template, input_variables=['context','problem'])
-    response = (prompt | llm).invoke({'context': code, 'problem':problem})
-    return response
\ No newline at end of file
+    chain = get_chain(prompt, ['context', 'problem'], operation="code_executor")
+    response = chain.invoke({'context': code, 'problem':problem})
+    return response
+
+
+# 4. Async variants used by the FastAPI routes
+#
+# Same behaviour as the functions above, but awaiting the chains' ainvoke and
+# the async Mongo driver so an event loop is never blocked on the network.
+
+async def aextract_candidate_info(candidate_id: str):
+    candidate_data = await get_storage().aget_candidate(candidate_id)
+    return candidate_data or {}
+
+async def ainvoke_json(prompt, input_variables, inputs, validate, response=None, operation="llm"):
+    chain = get_chain(prompt, input_variables, parser="text", operation=operation)
+    try:
+        return parse_llm_json(response if response is not None else await chain.ainvoke(inputs), validate)
+    except OutputParseError as e:
+        logger.warning("Unusable LLM output (%s), retrying once", e)
+    count_repair("llm_retry")
+    try:
+        return parse_llm_json(await chain.ainvoke(inputs), validate)
+    except OutputParseError:
+        count_repair("failed")
+        raise
+
+@instrument("generate_questions")
+async def agenerate_questions(candidate_data, prompt = genearte_questions_prompt):
+    response = await ainvoke_json(prompt, ['candidate_data'], {'candidate_data': compact_candidate_profile(candidate_data)}, validate_interview, operation="generate_questions")
+    questions = response["interview"]["questions"]
+    greeting_script = response["interview"]["greeting_script"]
+    return response, questions, greeting_script
+
+async def astore_interview_template(candidate_data, greeting, questions):
+    template_doc = build_interview_template(candidate_data, greeting, questions)
+    version, _ = await get_storage().astore_template(template_doc)
+    return version
+
+async def aget_stored_interview_template(candidate_id):
+    template_doc = await get_storage().aget_latest_template(candidate_id)
+    if template_doc:
+        return template_doc.get("greeting_script", ""), template_doc.get("questions", [])
+    return None, None
+
+@instrument("evaluate_answer")
+async def aevaluate_answer(question, answer, prompt=evaluation_prompt):
+    key = make_key(prompt, question, answer)
+    return await evaluation_cache.aget_or_compute(key, lambda: _aevaluate_answer_uncached(question, answer, prompt))
+
+async def _aevaluate_answer_uncached(question, answer, prompt=evaluation_prompt):
+    return await ainvoke_json(prompt, ['question', 'answer'], {'question': question, 'answer': answer}, validate_evaluation, operation="evaluate_answer")
+
+@instrument("evaluate_answers_batch")
+async def aevaluate_answers_batch(items, prompt=evaluation_prompt, max_concurrency=None):
+    """Async evaluate_answers_batch: fan out under an asyncio.Semaphore."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or EVAL_BATCH_CONCURRENCY))
+
+    async def run(index, item):
+        async with semaphore:
+            try:
+                with llm_priority(BATCH):
+                    evaluation = await aevaluate_answer(item['question'], item['answer'], prompt)
+                return {"index": index, "evaluation": evaluation, "error": None}
+            except Exception as e:
+                return {"index": index, "evaluation": None, "error": str(e)}
+
+    return await asyncio.gather(*(run(index, item) for index, item in enumerate(items)))
+
+@instrument("generate_follow_up_question")
+async def agenerate_follow_up_question(question, answer, prompt = followup_questions_prompt):
+    return await get_chain(prompt, ['question', 'answer'], operation="generate_follow_up_question").ainvoke({'question': question, 'answer': answer})
+
+@instrument("evaluate_with_follow_up")
+async def aevaluate_with_follow_up(question, answer, speculative=None):
+    """Async evaluate_with_follow_up; an unneeded speculative task is cancelled outright."""
+    speculative = SPECULATIVE_FOLLOW_UP if speculative is None else speculative
+    if not speculative:
+        evaluation = await aevaluate_answer(question, answer)
+        if evaluation["evaluation"]["score"] < FOLLOW_UP_THRESHOLD:
+            return evaluation, await agenerate_follow_up_question(question, answer)
+        return evaluation, None
+
+    _count_speculation("speculated")
+    started = asyncio.Event()
+
+    async def speculate():
+        started.set()
+        return await agenerate_follow_up_question(question, answer)
+
+    task = asyncio.create_task(speculate())
+    try:
+        evaluation = await aevaluate_answer(question, answer)
+    except BaseException:
+        _discard_speculation(task, started)
+        raise
+    if evaluation["evaluation"]["score"] < FOLLOW_UP_THRESHOLD:
+        _count_speculation("used")
+        return evaluation, await task
+    _discard_speculation(task, started)
+    return evaluation, None
+
+@instrument("stream_follow_up_question")
+async def astream_follow_up_question(question, answer, prompt = followup_questions_prompt):
+    async for chunk in get_chain(prompt, ['question', 'answer'], operation="generate_follow_up_question").astream({'question': question, 'answer': answer}):
+        yield as_text(chunk)
+
+@instrument("stream_evaluation")
+async def astream_evaluation(question, answer, prompt=evaluation_prompt):
+    key = make_key(prompt, question, answer)
+    cached = await evaluation_cache.alookup(key)
+    if cached is not MISSING:
+        for event in _cached_evaluation_events(cached):
+            yield event
+        return
+    start = time.perf_counter()
+    chain = get_chain(prompt, ['question', 'answer'], parser="text", operation="evaluate_answer")
+    events = _EvaluationEvents()
+    text = ""
+    async for chunk in chain.astream({'question': question, 'answer': answer}):
+        text += chunk
+        for event in events.update(partial_json(text)):
+            yield event
+    result = await ainvoke_json(prompt, ['question', 'answer'], {'question': question, 'answer': answer}, validate_evaluation, response=text, operation="evaluate_answer")
+    await asyncio.to_thread(evaluation_cache.store, key, result, time.perf_counter() - start)
+    for event in events.finish(result):
+        yield event
+
+@instrument("code_executor")
+async def acode_executor(code, problem, prompt=code_executor_prompt):
+    return await get_chain(prompt, ['context', 'problem'], operation="code_executor").ainvoke({'context': code, 'problem':problem})
+
+async def aget_candidate_average_score(candidate_id):
+    return await get_storage().aget_candidate_score(candidate_id)
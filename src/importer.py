@@ -0,0 +1,211 @@
+# Bulk candidate importer
+#
+# Loads resume dumps into candidate storage (src.storage: MongoDB or SQLite):
+#
+#   python -m src.importer dumps/candidates.json --batch-size 1000
+#   python -m src.importer dumps/candidates.ndjson --rejects rejects.ndjson
+#
+# The file is read in fixed-size chunks and decoded one document at a time
+# with JSONDecoder.raw_decode. That works for a JSON array, NDJSON or plain
+# concatenated JSON, and memory stays flat whatever the file size: a document
+# that still does not parse once MAX_DOCUMENT_SIZE characters are buffered is
+# reported as malformed instead of reading on to the end of the file. Extended
+# JSON ($date, $oid, ...) is converted with bson.json_util. Documents missing
+# required fields are skipped (and optionally written to --rejects). Valid ones
+# are upserted by _id in batches through Storage.upsert_candidates, so
+# re-running an import is safe and one bad write does not stop the batch.
+
+import argparse
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from bson import json_util
+
+from src.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20
+# MongoDB's own document limit; nothing larger could be stored anyway
+MAX_DOCUMENT_SIZE = 16 << 20
+REQUIRED_FIELDS = ("id", "personal_information.first_name", "personal_information.email")
+
+_decoder = json.JSONDecoder()
+
+
+class ImportFormatError(ValueError):
+    """The input is not a JSON array, NDJSON or concatenated JSON documents."""
+
+
+def _parse_date(value):
+    # Some dumps carry a doubled time part ("2021-08-29T00:00:00T00:00:00.000Z");
+    # keep the first date-time in that case
+    text = value.replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = datetime.fromisoformat(text[:19])
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _object_hook(dct):
+    try:
+        return json_util.object_hook(dct)
+    except (ValueError, TypeError):
+        if len(dct) == 1 and isinstance(dct.get("$date"), str):
+            return _parse_date(dct["$date"])
+        raise
+
+
+def iter_documents(f, chunk_size=CHUNK_SIZE, max_document_size=MAX_DOCUMENT_SIZE):
+    """Yield raw JSON values from a text file, one document at a time."""
+    buffer, pos, eof = "", 0, False
+    in_array = None
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        # Skip whitespace and array punctuation between documents
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    return
+                fill()
+                continue
+            char = buffer[pos]
+            if in_array is None:
+                in_array = char == "["
+                if in_array:
+                    pos += 1
+                    continue
+            if in_array and char in ",]":
+                pos += 1
+                continue
+            break
+
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ImportFormatError(f"Invalid JSON near character {e.pos}: {e.msg}") from e
+            if len(buffer) - pos >= max_document_size:
+                # Not a document split across chunks: no valid one is this large
+                raise ImportFormatError(
+                    f"No valid JSON document within {max_document_size} characters: {e.msg}") from e
+            # Most likely a document split across chunks: read more and retry
+            fill()
+            continue
+        # A number or literal at the end of the buffer might continue in the next chunk
+        if end == len(buffer) and not eof and not isinstance(value, (dict, list)):
+            fill()
+            continue
+        pos = end
+        yield value
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def prepare(raw):
+    """Convert extended JSON and check required fields; returns (doc, error)."""
+    if not isinstance(raw, dict):
+        return None, f"expected an object, got {type(raw).__name__}"
+    try:
+        doc = _object_hook_deep(raw)
+    except (ValueError, TypeError) as e:
+        return None, f"bad extended JSON: {e}"
+    # The app reads both: _id for lookups, id for templates
+    doc.setdefault("id", doc.get("_id"))
+    doc.setdefault("_id", doc["id"])
+    missing = [field for field in REQUIRED_FIELDS if not _get(doc, field)]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    return doc, None
+
+
+def _object_hook_deep(value):
+    # raw_decode has already built plain dicts, so apply the hook bottom-up
+    if isinstance(value, dict):
+        return _object_hook({k: _object_hook_deep(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_object_hook_deep(v) for v in value]
+    return value
+
+
+def _flush(storage, docs, stats):
+    if not docs:
+        return
+    written = storage.upsert_candidates(docs)
+    stats["written"] += written
+    stats["write_errors"] += len(docs) - written
+
+
+def run(path, batch_size=1000, rejects=None, dry_run=False, storage=None):
+    storage = storage or get_storage()
+    stats = {"read": 0, "valid": 0, "rejected": 0, "written": 0, "write_errors": 0}
+    reject_file = open(rejects, "w", encoding="utf-8") if rejects else None
+    started = time.perf_counter()
+    docs = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for raw in iter_documents(f):
+                stats["read"] += 1
+                doc, error = prepare(raw)
+                if error:
+                    stats["rejected"] += 1
+                    if stats["rejected"] <= 10:
+                        logger.warning("Rejected document %d: %s", stats["read"], error)
+                    if reject_file:
+                        reject_file.write(json.dumps({"error": error, "document": raw}, default=str) + "\n")
+                    continue
+                stats["valid"] += 1
+                if dry_run:
+                    continue
+                docs.append(doc)
+                if len(docs) >= batch_size:
+                    _flush(storage, docs, stats)
+                    docs = []
+                    elapsed = time.perf_counter() - started
+                    logger.info("%d read, %d written - %.0f rows/sec", stats["read"],
+                                stats["written"], stats["read"] / elapsed)
+            if not dry_run:
+                _flush(storage, docs, stats)
+    finally:
+        if reject_file:
+            reject_file.close()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["rows_per_second"] = round(stats["read"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import candidates from a JSON array or NDJSON dump")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per storage write")
+    parser.add_argument("--rejects", help="write rejected documents and reasons to this NDJSON file")
+    parser.add_argument("--dry-run", action="store_true", help="parse and validate only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
+    stats = run(args.path, args.batch_size, args.rejects, args.dry_run)
+    logger.info("Done: %s", stats)
+
+
+if __name__ == "__main__":
+    main()
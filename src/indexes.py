@@ -0,0 +1,136 @@
+# Index management
+#
+# Every lookup in src.repository filters on candidate_id, so each collection
+# gets an index matching its access pattern. ensure_indexes() is idempotent
+# (create_indexes is a no-op for indexes that already exist) and runs at API
+# and Streamlit startup; it can also be run by hand, with a COLLSCAN report:
+#
+#   python -m src.indexes --explain
+
+import argparse
+import json
+import logging
+import os
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from src.db import get_db
+from src.repository import CANDIDATES, TEMPLATES, INTERVIEWS, CODING_SUBMISSIONS, CODING_DB, DIAGRAMS, candidate_query
+
+logger = logging.getLogger(__name__)
+
+# (database or None for the default, collection) -> indexes
+INDEXES = {
+    (None, CANDIDATES): [
+        # Prefix search in the candidate picker (_id prefixes use the _id index)
+        IndexModel([("personal_information.first_name", ASCENDING)], name="first_name_prefix"),
+    ],
+    (None, TEMPLATES): [
+        # Latest template version for a candidate; content_hash makes the
+        # version check in src.templates a covered query
+        IndexModel([("candidate_id", ASCENDING), ("version", DESCENDING), ("content_hash", ASCENDING)],
+                   name="candidate_version"),
+    ],
+    (None, INTERVIEWS): [
+        IndexModel([("candidate_id", ASCENDING), ("_id", DESCENDING)], name="candidate_latest"),
+    ],
+    (CODING_DB, CODING_SUBMISSIONS): [
+        IndexModel([("candidate_id", ASCENDING), ("timestamp", DESCENDING)], name="candidate_latest"),
+    ],
+    (None, DIAGRAMS): [
+        IndexModel([("candidate_id", ASCENDING), ("created_at", DESCENDING)], name="candidate_latest"),
+    ],
+}
+
+# Indexes replaced by the ones above, dropped by ensure_indexes()
+RETIRED_INDEXES = {
+    (None, TEMPLATES): ["candidate_latest"],
+}
+
+# Queries the repository issues, checked by explain_report(); the value does
+# not matter to the planner
+SAMPLE_ID = "__explain__"
+ACCESS_PATTERNS = [
+    ("candidate by id", None, CANDIDATES, {"_id": SAMPLE_ID}, None),
+    ("candidate search", None, CANDIDATES, candidate_query("Jo"), [("_id", ASCENDING)]),
+    ("latest template", None, TEMPLATES, {"candidate_id": SAMPLE_ID}, [("version", DESCENDING)]),
+    ("latest interview", None, INTERVIEWS, {"candidate_id": SAMPLE_ID}, [("_id", DESCENDING)]),
+    ("coding submissions by candidate", CODING_DB, CODING_SUBMISSIONS, {"candidate_id": SAMPLE_ID}, [("timestamp", DESCENDING)]),
+    ("latest diagram", None, DIAGRAMS, {"candidate_id": SAMPLE_ID}, [("created_at", DESCENDING)]),
+]
+
+
+def ensure_indexes():
+    """Create any missing indexes; returns {"db.collection": [index names]}."""
+    created = {}
+    for (db_name, collection_name), names in RETIRED_INDEXES.items():
+        collection = get_db(db_name)[collection_name]
+        for name in set(names) & set(collection.index_information()):
+            collection.drop_index(name)
+    for (db_name, collection_name), models in INDEXES.items():
+        collection = get_db(db_name)[collection_name]
+        created[collection.full_name] = collection.create_indexes(models)
+    return created
+
+
+def ensure_indexes_safely():
+    """ensure_indexes() for startup hooks (skipped with MONGO_ENSURE_INDEXES=0 or a non-Mongo STORAGE_BACKEND); never raises."""
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") != "1" or os.getenv("STORAGE_BACKEND", "mongo") != "mongo":
+        return None
+    try:
+        created = ensure_indexes()
+        logger.info("Indexes ensured: %s", created)
+        return created
+    except Exception as e:
+        logger.warning("Could not ensure indexes: %s", e)
+        return None
+
+
+def _stages(plan):
+    """Yield every stage name in an explain plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+def explain_report():
+    """Winning plan stages for each access pattern, flagging collection scans."""
+    report = []
+    for label, db_name, collection_name, query, sort in ACCESS_PATTERNS:
+        cursor = get_db(db_name)[collection_name].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_stages(plan))
+        report.append({
+            "query": label,
+            "collection": f"{get_db(db_name).name}.{collection_name}",
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes for the interview collections")
+    parser.add_argument("--explain", action="store_true", help="report access patterns that still collection-scan")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
+    logger.info("Indexes: %s", json.dumps(ensure_indexes()))
+    if args.explain:
+        report = explain_report()
+        for row in report:
+            logger.info("%-32s %-40s %s%s", row["query"], row["collection"], " > ".join(row["stages"]),
+                        "  <-- COLLSCAN" if row["collscan"] else "")
+        if any(row["collscan"] for row in report):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# LLM provider registry
+#
+# The model client used to be built (and probed with a full completion) at
+# import time of src.helper. Providers are now registered as factories and the
+# client is only constructed on first use, so importing the helpers is free.
+
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PROVIDERS = {}
+_instances = {}
+_lock = threading.Lock()
+
+WARMUP_PROMPT = "Reply with the single word: ready"
+
+
+def register_provider(name, factory):
+    """Register a zero-argument factory that builds an LLM for `name`."""
+    _PROVIDERS[name] = factory
+
+
+def available_providers():
+    return sorted(_PROVIDERS)
+
+
+def default_provider():
+    return os.getenv("LLM_PROVIDER", "euriai")
+
+
+def get_llm(name=None):
+    """Return the (lazily built, process-wide) LLM for a provider."""
+    name = name or default_provider()
+    llm = _instances.get(name)
+    if llm is not None:
+        return llm
+    with _lock:
+        llm = _instances.get(name)
+        if llm is None:
+            if name not in _PROVIDERS:
+                raise ValueError(f"Unknown LLM provider '{name}'. Available: {available_providers()}")
+            llm = _PROVIDERS[name]()
+            _instances[name] = llm
+            logger.info("Initialised LLM provider '%s'", name)
+    return llm
+
+
+def active_llms():
+    """Clients built so far, without building any new ones."""
+    return dict(_instances)
+
+
+def reset_llm(name=None):
+    """Drop cached clients so the next get_llm() rebuilds them."""
+    with _lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+
+def warm_up(name=None, prompt=WARMUP_PROMPT):
+    """Opt-in warm-up: build the client and send one tiny request.
+
+    Nothing calls this implicitly; use it from a startup hook when paying for
+    one short completion up front is preferable to a slower first request.
+    """
+    llm = get_llm(name)
+    return llm.invoke(prompt)
+
+
+def warm_up_if_enabled():
+    """Run warm_up() when LLM_WARMUP=1, never raising on failure."""
+    if os.getenv("LLM_WARMUP", "0") != "1":
+        return False
+    try:
+        warm_up()
+        return True
+    except Exception as e:
+        logger.warning("LLM warm-up failed: %s", e)
+        return False
+
+
+# Built-in providers; imports are deferred so unused SDKs are never loaded.
+
+def _build_euriai():
+    from euriai import EuriaiLangChainLLM
+    return EuriaiLangChainLLM(
+        api_key=os.getenv("EURON_API_KEY"),
+        model=os.getenv("EURIAI_MODEL", "gpt-4.1-nano"),
+    )
+
+
+def _build_groq():
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+        temperature=0,
+    )
+
+
+def _build_router():
+    from src.router import build_router
+    return build_router()
+
+
+def _build_fake():
+    from src.fake_llm import build_fake_llm
+    return build_fake_llm()
+
+
+register_provider("euriai", _build_euriai)
+register_provider("groq", _build_groq)
+register_provider("router", _build_router)
+register_provider("fake", _build_fake)
@@ -0,0 +1,273 @@
+# Prometheus-style metrics
+#
+# Latency histograms and counters for the places time goes in a request:
+#
+# - helper functions (LLM chains), via the @instrument("operation") decorator
+# - MongoDB commands, via a pymongo CommandListener labelled by collection
+# - FastAPI routes, via install_http_metrics(app), labelled by route template
+#
+# Token usage and cache hit counters already kept by src.tokens / src.cache are
+# read at scrape time, so they cost nothing per request. GET /metrics renders
+# everything in the Prometheus text format.
+#
+# METRICS_ENABLED=0 turns all of it off at import time: @instrument returns the
+# function unchanged, no listener or middleware is installed, and /metrics 404s.
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        with self._lock:
+            series = {labels: {**s, "counts": list(s["counts"])} for labels, s in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, s in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, s["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', '+Inf')])} {s['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {s['sum']}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {s['count']}")
+        return lines
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (None when empty); shared by the router and the load tests."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+helper_duration = Histogram("aieta_helper_duration_seconds", "Helper call latency, LLM time included", ["operation"])
+helper_calls = Counter("aieta_helper_calls_total", "Helper calls by outcome", ["operation", "outcome"])
+mongo_duration = Histogram("aieta_mongo_command_duration_seconds", "MongoDB command latency", ["collection", "command"])
+mongo_failures = Counter("aieta_mongo_command_failures_total", "Failed MongoDB commands", ["collection", "command"])
+http_duration = Histogram("aieta_http_request_duration_seconds", "HTTP request latency until response headers", ["method", "route", "status"])
+
+_METRICS = [helper_duration, helper_calls, mongo_duration, mongo_failures, http_duration]
+
+
+# 1. Helper functions
+
+def _observe(operation, start, outcome):
+    helper_duration.observe(time.perf_counter() - start, operation)
+    helper_calls.inc(operation, outcome)
+
+
+def instrument(operation):
+    """Time a sync/async function or generator under `operation`.
+
+    Generators are timed until they are exhausted or closed.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start, outcome = time.perf_counter(), "error"
+                try:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                    outcome = "ok"
+                finally:
+                    _observe(operation, start, outcome)
+        elif inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start, outcome = time.perf_counter(), "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    _observe(operation, start, outcome)
+        elif inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start, outcome = time.perf_counter(), "error"
+                try:
+                    yield from func(*args, **kwargs)
+                    outcome = "ok"
+                finally:
+                    _observe(operation, start, outcome)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start, outcome = time.perf_counter(), "error"
+                try:
+                    result = func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    _observe(operation, start, outcome)
+        return wrapper
+    return decorator
+
+
+# 2. MongoDB commands
+
+# Handshake/auth chatter that would only add noise
+_IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildInfo"}
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records every command's duration, labelled by collection and command name."""
+
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event):
+        return event.request_id, event.connection_id
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore carries a cursor id; the collection is a separate field
+            collection = event.command.get("collection", "-")
+        with self._lock:
+            self._collections[self._key(event)] = f"{event.database_name}.{collection}"
+
+    def _finish(self, event, failed):
+        with self._lock:
+            collection = self._collections.pop(self._key(event), None)
+        if collection is None:
+            return
+        mongo_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        if failed:
+            mongo_failures.inc(collection, event.command_name)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+if ENABLED:
+    # Global listeners only apply to clients created afterwards; every client
+    # in this repo is created lazily, after src.helper has imported this module
+    monitoring.register(MongoCommandMetrics())
+
+
+# 3. HTTP routes
+
+def install_http_metrics(app):
+    """Add request timing middleware to a FastAPI app (no-op when disabled)."""
+    if not ENABLED:
+        return
+
+    @app.middleware("http")
+    async def record_request(request, call_next):
+        start, status = time.perf_counter(), 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template so /interview/{candidate_id} is one series
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_duration.observe(time.perf_counter() - start, request.method, path, status)
+
+
+# 4. Exposition
+
+def _collected():
+    """Counters kept elsewhere, read at scrape time."""
+    from src.cache import evaluation_cache
+    from src.tokens import token_usage
+
+    lines = ["# HELP aieta_llm_tokens_total Tokens sent to / received from the LLM",
+             "# TYPE aieta_llm_tokens_total counter"]
+    for operation, totals in sorted(token_usage.stats().items()):
+        for kind in ("prompt", "completion"):
+            lines.append(f"aieta_llm_tokens_total{_labels(['operation', 'kind'], [operation, kind])} {totals[f'{kind}_tokens']}")
+
+    cache = evaluation_cache.stats()
+    lines += ["# HELP aieta_cache_requests_total Response cache lookups by result",
+              "# TYPE aieta_cache_requests_total counter"]
+    for result in ("memory_hits", "mongo_hits", "misses"):
+        lines.append(f"aieta_cache_requests_total{_labels(['cache', 'result'], [evaluation_cache.name, result])} {cache[result]}")
+    return lines
+
+
+def render():
+    lines = []
+    for metric in _METRICS:
+        lines += metric.render()
+    lines += _collected()
+    return "\n".join(lines) + "\n"
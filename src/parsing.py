@@ -0,0 +1,231 @@
+# Tolerant JSON extraction for LLM output
+#
+# Models regularly wrap the requested JSON in prose or a ```json fence, leave
+# trailing commas, or stop mid-object. JsonOutputParser rejects all of these,
+# which used to mean paying for the whole LLM call again. parse_llm_json tries
+# progressively more aggressive local repairs first and validates the result
+# against the shape the callers index into; the helpers only go back to the
+# model when nothing local works. Every path taken is counted.
+
+import json
+import re
+import threading
+
+from langchain_core.utils.json import parse_json_markdown
+
+
+class OutputParseError(ValueError):
+    """LLM output could not be turned into the expected JSON structure."""
+
+
+REPAIR_PATHS = (
+    "direct",
+    "fence_stripped",
+    "brace_extracted",
+    "trailing_comma_repaired",
+    "truncation_closed",
+    "unrepairable",
+    "schema_invalid",
+    "llm_retry",
+    "failed",
+)
+
+_stats = dict.fromkeys(REPAIR_PATHS, 0)
+_lock = threading.Lock()
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def count_repair(path):
+    with _lock:
+        _stats[path] += 1
+
+
+def repair_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def as_text(response):
+    # Chat models return messages, plain LLMs return strings
+    return response.content if hasattr(response, "content") else str(response)
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def _strip_fence(text):
+    match = _FENCE.search(text)
+    return match.group(1).strip() if match else None
+
+
+def _balanced_object(text):
+    """Return the first brace-balanced {...} in text, respecting JSON strings.
+
+    If the text ends before the object closes, return the open tail instead so
+    the truncation repair can try to finish it.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _remove_trailing_commas(text):
+    out = []
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if rest[:1] in ("}", "]"):
+                continue
+        out.append(ch)
+    return "".join(out)
+
+
+def _close_truncated(text):
+    """Close any string, array and object left open by a truncated response."""
+    stack = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    text = text + '"' if in_string else text
+    text = _remove_trailing_commas(text.rstrip().rstrip(",").rstrip(":"))
+    return text + "".join(reversed(stack))
+
+
+def extract_json(text):
+    """Return (obj, repair_path) for the JSON object in `text`, or raise OutputParseError."""
+    text = text.strip()
+    obj = _loads(text)
+    if obj is not None:
+        return obj, "direct"
+
+    fenced = _strip_fence(text)
+    if fenced:
+        obj = _loads(fenced)
+        if obj is not None:
+            return obj, "fence_stripped"
+
+    candidate = _balanced_object(fenced or text) or _balanced_object(text)
+    if candidate is None:
+        raise OutputParseError("No JSON object found in LLM output")
+    obj = _loads(candidate)
+    if obj is not None:
+        return obj, "brace_extracted"
+
+    obj = _loads(_remove_trailing_commas(candidate))
+    if obj is not None:
+        return obj, "trailing_comma_repaired"
+
+    obj = _loads(_close_truncated(candidate))
+    if obj is not None:
+        return obj, "truncation_closed"
+    raise OutputParseError("LLM output is not valid JSON and could not be repaired")
+
+
+def partial_json(text):
+    """Best-effort parse of a still-streaming response (None if nothing parses yet)."""
+    try:
+        return parse_json_markdown(text)
+    except Exception:
+        return None
+
+
+# Schema validation: check (and lightly coerce) exactly what callers index into
+
+def _coerce_score(score):
+    if isinstance(score, bool):
+        raise OutputParseError("evaluation.score must be a number")
+    if isinstance(score, (int, float)):
+        return score
+    match = re.match(r"\s*(\d+(?:\.\d+)?)", str(score))
+    if not match:
+        raise OutputParseError(f"evaluation.score is not a number: {score!r}")
+    value = float(match.group(1))
+    return int(value) if value.is_integer() else value
+
+
+def validate_evaluation(obj):
+    evaluation = obj.get("evaluation") if isinstance(obj, dict) else None
+    if not isinstance(evaluation, dict) or "score" not in evaluation:
+        raise OutputParseError("Missing evaluation.score")
+    evaluation["score"] = _coerce_score(evaluation["score"])
+    if not 0 <= evaluation["score"] <= 10:
+        raise OutputParseError(f"evaluation.score out of range: {evaluation['score']}")
+    feedback = evaluation.get("feedback", [])
+    evaluation["feedback"] = [feedback] if isinstance(feedback, str) else [str(f) for f in feedback or []]
+    return obj
+
+
+def validate_interview(obj):
+    interview = obj.get("interview") if isinstance(obj, dict) else None
+    if not isinstance(interview, dict):
+        raise OutputParseError("Missing interview object")
+    questions = interview.get("questions")
+    if not isinstance(questions, list) or not questions or not all(isinstance(q, str) for q in questions):
+        raise OutputParseError("interview.questions must be a non-empty list of strings")
+    if not isinstance(interview.get("greeting_script"), str):
+        raise OutputParseError("interview.greeting_script must be a string")
+    return obj
+
+
+def parse_llm_json(response, validate=None):
+    """Extract, repair and validate JSON from an LLM response, counting the path taken."""
+    try:
+        obj, path = extract_json(as_text(response))
+    except OutputParseError:
+        count_repair("unrepairable")
+        raise
+    if validate is not None:
+        try:
+            obj = validate(obj)
+        except OutputParseError:
+            count_repair("schema_invalid")
+            raise
+    count_repair(path)
+    return obj
@@ -0,0 +1,140 @@
+# Bulk interview-template pre-generation
+#
+# Generates templates for every candidate ahead of time so recruiters do not
+# wait on the LLM when starting an interview:
+#
+#   python -m src.pregenerate --workers 8 --chunk-size 50
+#
+# Candidates are streamed in _id order and processed in chunks. Each chunk is
+# generated on a worker pool, stored as new template versions with one bulk
+# insert (see src.templates.store_templates), and then recorded
+# as a checkpoint, so a crashed run resumes after the last completed chunk.
+# Candidates whose latest template still matches their profile and the current
+# prompt (see template_source_hash) are skipped.
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+from src.db import get_db
+from src.helper import generate_questions, build_interview_template, template_source_hash
+from src.templates import store_templates
+from src.ratelimit import llm_priority, BATCH
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = "interview_templates"
+
+
+def _chunks(cursor, size):
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _up_to_date(templates, chunk):
+    """Return the candidate ids in `chunk` whose latest template is still current.
+
+    Only the latest version counts (resolved like get_latest_template): a profile
+    that changed and changed back matches an older version, not the latest.
+    """
+    hashes = {c.get('id', c['_id']): template_source_hash(c) for c in chunk}
+    latest = templates.aggregate([
+        {"$match": {"candidate_id": {"$in": list(hashes)}}},
+        {"$sort": {"candidate_id": 1, "version": -1}},
+        {"$group": {"_id": "$candidate_id", "source_hash": {"$first": "$source_hash"}}},
+    ])
+    return {t["_id"] for t in latest if hashes.get(t["_id"]) == t["source_hash"]}
+
+
+def _generate(candidate):
+    try:
+        # Draw from the background budget so interactive traffic is not starved
+        with llm_priority(BATCH):
+            _, questions, greeting = generate_questions(candidate)
+        return build_interview_template(candidate, greeting, questions), None
+    except Exception as e:
+        return None, f"{candidate['_id']}: {e}"
+
+
+def run(workers=4, chunk_size=50, limit=None, force=False, restart=False, db_name=None):
+    db = get_db(db_name)
+    candidates, templates, jobs = db['candidates'], db['interview_templates'], db['pregeneration_jobs']
+
+    checkpoint = None if restart else jobs.find_one({"_id": JOB_ID})
+    query = {"_id": {"$gt": checkpoint["last_candidate_id"]}} if checkpoint else {}
+    if checkpoint:
+        logger.info("Resuming after candidate %s", checkpoint["last_candidate_id"])
+
+    cursor = candidates.find(query).sort("_id", 1).batch_size(chunk_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    stats = {"seen": 0, "skipped": 0, "generated": 0, "unchanged": 0, "failed": 0}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk in _chunks(cursor, chunk_size):
+            skip = set() if force else _up_to_date(templates, chunk)
+            todo = [c for c in chunk if c.get('id', c['_id']) not in skip]
+            docs = []
+            for doc, error in pool.map(_generate, todo):
+                if error:
+                    stats["failed"] += 1
+                    logger.warning("Template generation failed for %s", error)
+                else:
+                    docs.append(doc)
+            stored = store_templates(docs) if docs else 0
+
+            stats["seen"] += len(chunk)
+            stats["skipped"] += len(chunk) - len(todo)
+            stats["generated"] += len(docs)
+            stats["unchanged"] += len(docs) - stored
+            jobs.update_one(
+                {"_id": JOB_ID},
+                {"$set": {"last_candidate_id": chunk[-1]["_id"], "updated_at": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "%d candidates (%d generated, %d skipped, %d failed) - %.1f candidates/min",
+                stats["seen"], stats["generated"], stats["skipped"], stats["failed"],
+                stats["seen"] / elapsed * 60 if elapsed else 0.0,
+            )
+
+    # A complete pass clears the checkpoint so the next run starts from the top
+    if not limit:
+        jobs.delete_one({"_id": JOB_ID})
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["candidates_per_minute"] = round(stats["seen"] / elapsed * 60, 2) if elapsed else 0.0
+    stats["generated_per_minute"] = round(stats["generated"] / elapsed * 60, 2) if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate interview templates for all candidates")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent LLM calls")
+    parser.add_argument("--chunk-size", type=int, default=50, help="candidates per bulk write / checkpoint")
+    parser.add_argument("--limit", type=int, help="stop after this many candidates")
+    parser.add_argument("--force", action="store_true", help="regenerate even up-to-date templates")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
+    stats = run(args.workers, args.chunk_size, args.limit, args.force, args.restart)
+    logger.info("Done: %s", stats)
+
+
+if __name__ == "__main__":
+    main()
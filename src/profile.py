@@ -0,0 +1,108 @@
+# Compact candidate profiles for question generation
+#
+# The raw candidate document carries Mongo $date wrappers, contact details,
+# salary expectations and references that the question prompt never needs.
+# compact_candidate_profile projects only what the interview is about (skills,
+# experience, projects, education) into short canonical lines, which keeps the
+# prompt small and makes equal profiles render identically.
+
+from datetime import date, datetime
+
+
+def _date(value):
+    """Render extended-JSON {"$date": ...}, datetime or ISO strings as YYYY-MM."""
+    if isinstance(value, dict):
+        value = value.get("$date")
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m")
+    if isinstance(value, str) and len(value) >= 7:
+        return value[:7]
+    return None
+
+
+def _join(values, sep=", "):
+    if not values:
+        return ""
+    if isinstance(values, str):
+        return values
+    return sep.join(str(v) for v in values if v not in (None, ""))
+
+
+def _line(label, value):
+    return f"{label}: {value}" if value else None
+
+
+def _education(candidate):
+    edu = candidate.get("education_qualifications") or {}
+    degree = " ".join(filter(None, [edu.get("degree_name"), edu.get("specialization")]))
+    parts = [p for p in [degree, edu.get("university_name")] if p]
+    text = ", ".join(parts)
+    if edu.get("highest_education_level"):
+        text += f" ({edu['highest_education_level']})"
+    return text.strip()
+
+
+def _experience(candidate):
+    lines = []
+    for job in candidate.get("work_experience") or []:
+        title = job.get("job_title") or "Role"
+        company = job.get("company_name")
+        head = f"{title} at {company}" if company else title
+        start, end = _date(job.get("start_date")), _date(job.get("end_date"))
+        if start or end:
+            head += f" ({start or '?'} to {end or 'present'})"
+        details = _join(job.get("key_responsibilities"), "; ")
+        if details:
+            head += f": {details}"
+        achievements = _join(job.get("achievements"), "; ")
+        if achievements:
+            head += f". Achievements: {achievements}"
+        lines.append(f"- {head}")
+    return lines
+
+
+SKILL_LABELS = {
+    "programming_languages": "languages",
+    "frameworks_worked": "frameworks",
+    "development_tools": "tools",
+    "operating_systems": "os",
+    "database_management_systems": "databases",
+    "cloud_platforms": "cloud",
+}
+
+
+def _skills(candidate):
+    skills = candidate.get("technical_skills") or {}
+    parts = []
+    for key, values in skills.items():
+        text = _join(values)
+        if text:
+            parts.append(f"{SKILL_LABELS.get(key, key.replace('_', ' '))}: {text}")
+    return " | ".join(parts)
+
+
+def _soft_skills(candidate):
+    soft = candidate.get("soft_skills") or {}
+    return ", ".join(f"{k.replace('_', ' ')} {v}" for k, v in soft.items() if v)
+
+
+def compact_candidate_profile(candidate):
+    """Return the interview-relevant parts of a candidate document as dense text."""
+    if isinstance(candidate, str):
+        return candidate
+    info = candidate.get("personal_information") or {}
+    awards = candidate.get("achievements_awards") or {}
+    certificates = list((candidate.get("education_qualifications") or {}).get("certificates_diplomas") or [])
+    certificates += (candidate.get("certifications_licenses") or {}).get("certificates_licenses") or []
+
+    lines = [
+        _line("Name", " ".join(filter(None, [info.get("first_name"), info.get("last_name")])) or info.get("name")),
+        _line("Education", _education(candidate)),
+        "Experience:\n" + "\n".join(_experience(candidate)) if candidate.get("work_experience") else None,
+        _line("Skills", _skills(candidate)),
+        _line("Soft skills", _soft_skills(candidate)),
+        _line("Projects", _join(awards.get("projects_awards"), "; ")),
+        _line("Publications", _join(awards.get("publications_presentations"), "; ")),
+        _line("Certifications", _join(dict.fromkeys(certificates))),
+    ]
+    return "\n".join(line for line in lines if line)
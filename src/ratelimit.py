@@ -0,0 +1,365 @@
+# Rate limiting and circuit breaking for LLM calls
+#
+# Every compiled chain wraps its LLM in GuardedLLM (see src.chains), so all
+# helper calls -- including retries and streams -- draw from a token bucket and
+# pass a shared circuit breaker:
+#
+# - Two budgets: "interactive" (candidates waiting on a page or API call) and
+#   "batch" (pre-generation, batch scoring). Code running background work
+#   wraps it in `with llm_priority("batch"):`.
+# - Buckets are in-process by default; LLM_RATE_LIMIT_BACKEND=mongo shares them
+#   across processes/workers through an atomic update on the `rate_limits`
+#   collection.
+# - After LLM_BREAKER_FAILURES consecutive provider errors the breaker opens
+#   and calls fail fast with CircuitOpenError until LLM_BREAKER_RESET seconds
+#   pass; then one trial call decides whether it closes again.
+# - Behind the router (src.router) each backend is guarded on its own: hedged
+#   duplicates and failovers draw tokens like any other call, and every backend
+#   has its own breaker so a failing primary does not block the fallback.
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from langchain_core.runnables import Runnable
+from pymongo import ReturnDocument
+
+from src.db import get_db
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def llm_priority(priority):
+    """Run LLM calls in this block against the given budget."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class LLMUnavailableError(Exception):
+    """The LLM call was refused locally; `status_code` and `retry_after` describe why."""
+
+    status_code = 503
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitExceeded(LLMUnavailableError):
+    status_code = 429
+
+
+class CircuitOpenError(LLMUnavailableError):
+    status_code = 503
+
+
+class TokenBucket:
+    """In-process token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "capacity": self.capacity, "tokens": round(self._tokens, 2)}
+
+
+class MongoTokenBucket(TokenBucket):
+    """Token bucket shared by every process through one Mongo document.
+
+    The refill and the take happen in a single pipeline update using the
+    server clock ($$NOW), so concurrent workers never double-spend a token.
+    """
+
+    def __init__(self, name, rate, capacity, db_name=None):
+        super().__init__(name, rate, capacity)
+        self._collection = get_db(db_name)["rate_limits"]
+
+    def try_acquire(self):
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [self.capacity, {"$add": [{"$ifNull": ["$tokens", self.capacity]}, {"$multiply": [elapsed, self.rate]}]}]}
+        doc = self._collection.find_one_and_update(
+            {"_id": self.name},
+            [
+                {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                {"$set": {
+                    "granted": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._tokens = doc["tokens"]
+        return 0.0 if doc["granted"] else (1 - doc["tokens"]) / self.rate
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_timeout`."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.counts = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.counts["rejected"] += 1
+            retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError("LLM provider is unhealthy; failing fast", retry_after=round(retry_after, 1))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    self.counts["opened"] += 1
+                    logger.warning("LLM circuit breaker opened after %d failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self):
+        """A call ended without a verdict (cancelled/closed early); free the trial slot."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._failures, **self.counts}
+
+
+class LLMGuard:
+    """Per-priority buckets plus one breaker, shared by every GuardedLLM."""
+
+    def __init__(self, buckets, breaker, max_wait):
+        self.buckets = buckets
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self.counts = {INTERACTIVE: {"granted": 0, "throttled": 0, "rejected": 0},
+                       BATCH: {"granted": 0, "throttled": 0, "rejected": 0}}
+
+    def _count(self, priority, field):
+        with self._lock:
+            self.counts[priority][field] += 1
+
+    def _next_wait(self, priority, deadline):
+        wait = self.buckets[priority].try_acquire()
+        if wait == 0:
+            self._count(priority, "granted")
+            return 0.0
+        if time.monotonic() + wait > deadline:
+            self._count(priority, "rejected")
+            raise RateLimitExceeded(f"LLM {priority} rate limit exceeded", retry_after=round(wait, 1))
+        return wait
+
+    def acquire(self, priority):
+        # Check the breaker first so an open circuit does not burn tokens
+        self.breaker.before_call()
+        deadline = time.monotonic() + self.max_wait[priority]
+        throttled = False
+        try:
+            while True:
+                wait = self._next_wait(priority, deadline)
+                if wait == 0:
+                    return
+                if not throttled:
+                    throttled = True
+                    self._count(priority, "throttled")
+                time.sleep(wait)
+        except BaseException:
+            self.breaker.release()
+            raise
+
+    async def aacquire(self, priority):
+        self.breaker.before_call()
+        deadline = time.monotonic() + self.max_wait[priority]
+        shared = isinstance(self.buckets[priority], MongoTokenBucket)
+        throttled = False
+        try:
+            while True:
+                if shared:
+                    wait = await asyncio.to_thread(self._next_wait, priority, deadline)
+                else:
+                    wait = self._next_wait(priority, deadline)
+                if wait == 0:
+                    return
+                if not throttled:
+                    throttled = True
+                    self._count(priority, "throttled")
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.breaker.release()
+            raise
+
+    def stats(self):
+        with self._lock:
+            counts = {p: dict(c) for p, c in self.counts.items()}
+        return {
+            "breaker": self.breaker.stats(),
+            "budgets": {p: {**self.buckets[p].stats(), **counts[p]} for p in self.buckets},
+        }
+
+
+def _build_guard():
+    shared = os.getenv("LLM_RATE_LIMIT_BACKEND", "memory") == "mongo"
+    bucket_cls = MongoTokenBucket if shared else TokenBucket
+    buckets = {
+        INTERACTIVE: bucket_cls("llm_interactive",
+                                float(os.getenv("LLM_RATE_INTERACTIVE", "5")),
+                                float(os.getenv("LLM_BURST_INTERACTIVE", "10"))),
+        BATCH: bucket_cls("llm_batch",
+                          float(os.getenv("LLM_RATE_BATCH", "1")),
+                          float(os.getenv("LLM_BURST_BATCH", "2"))),
+    }
+    breaker = CircuitBreaker(int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                             float(os.getenv("LLM_BREAKER_RESET", "30")))
+    # Candidates should get a quick answer; background work can queue longer
+    max_wait = {INTERACTIVE: float(os.getenv("LLM_MAX_WAIT_INTERACTIVE", "10")),
+                BATCH: float(os.getenv("LLM_MAX_WAIT_BATCH", "300"))}
+    return LLMGuard(buckets, breaker, max_wait)
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_guard():
+    global _guard
+    if _guard is None:
+        with _guard_lock:
+            if _guard is None:
+                _guard = _build_guard()
+    return _guard
+
+
+_backend_guards = {}
+
+
+def backend_guard(name):
+    """Guard for one router backend: the shared budgets, with a breaker of its own."""
+    guard = _backend_guards.get(name)
+    if guard is None:
+        shared = get_guard()
+        with _guard_lock:
+            guard = _backend_guards.get(name)
+            if guard is None:
+                breaker = CircuitBreaker(shared.breaker.failure_threshold, shared.breaker.reset_timeout)
+                guard = _backend_guards[name] = LLMGuard(shared.buckets, breaker, shared.max_wait)
+    return guard
+
+
+class GuardedLLM(Runnable):
+    """Wraps an LLM so every call is rate limited and passes the circuit breaker."""
+
+    def __init__(self, llm, guard=None):
+        self.llm = llm
+        self._guard = guard
+
+    @property
+    def guard(self):
+        return self._guard or get_guard()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _outcome(breaker):
+        try:
+            yield
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+
+    def invoke(self, input, config=None, **kwargs):
+        guard = self.guard
+        guard.acquire(current_priority())
+        with self._outcome(guard.breaker):
+            return self.llm.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        guard = self.guard
+        await guard.aacquire(current_priority())
+        with self._outcome(guard.breaker):
+            return await self.llm.ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        guard = self.guard
+        guard.acquire(current_priority())
+        with self._outcome(guard.breaker):
+            yield from self.llm.stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        guard = self.guard
+        await guard.aacquire(current_priority())
+        with self._outcome(guard.breaker):
+            async for chunk in self.llm.astream(input, config, **kwargs):
+                yield chunk
+
+
+def guard_stats():
+    if _guard is None:
+        return None
+    stats = get_guard().stats()
+    if _backend_guards:
+        stats["backend_breakers"] = {name: guard.breaker.stats() for name, guard in _backend_guards.items()}
+    return stats
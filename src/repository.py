@@ -0,0 +1,199 @@
+# Data access for candidates, interview templates, interviews, coding submissions
+# and diagrams
+#
+# All reads and writes go through these functions so they share the pooled
+# clients from src.db and the collection names live in one place. Functions
+# prefixed with `a` are the async (FastAPI) equivalents. The app itself reaches
+# them through src.storage, which can swap MongoDB for an embedded backend.
+
+import logging
+import re
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from src.db import get_db, get_async_db
+
+logger = logging.getLogger(__name__)
+
+CANDIDATES = "candidates"
+TEMPLATES = "interview_templates"
+INTERVIEWS = "interviews"
+CODING_SUBMISSIONS = "coding_submissions"
+DIAGRAMS = "diagrams"
+
+# Coding submissions have always lived in their own database
+CODING_DB = "ai_interviewer"
+
+CANDIDATE_LIST_PROJECTION = {'_id': 1, 'personal_information.first_name': 1}
+
+# Newest first; served by the candidate_version / candidate_latest indexes (see src.indexes)
+LATEST_VERSION = [("version", DESCENDING)]
+LATEST_INSERTED = [("_id", DESCENDING)]
+LATEST_CREATED = [("created_at", DESCENDING)]
+
+
+# 1. Candidates
+
+def get_candidate(candidate_id):
+    return get_db()[CANDIDATES].find_one({"_id": candidate_id})
+
+def first_candidate():
+    return get_db()[CANDIDATES].find_one()
+
+def candidate_query(search=None, after=None):
+    """Filter for an _id-ordered candidate listing.
+
+    `search` is a prefix of the candidate id or first name. Anchored,
+    case-sensitive regexes are the only kind MongoDB can answer from an index,
+    so the prefix is tried as typed and capitalised (ids upper-cased).
+    """
+    query = {}
+    if search:
+        search = search.strip()
+        names = {search, search[:1].upper() + search[1:]}
+        query["$or"] = [
+            {"_id": {"$in": [re.compile("^" + re.escape(p)) for p in {search, search.upper()}]}},
+            {"personal_information.first_name": {"$in": [re.compile("^" + re.escape(p)) for p in names]}},
+        ]
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return query
+
+def upsert_candidates(candidates):
+    """Insert or replace candidates by _id in one unordered bulk write; returns the count written.
+
+    One failed write does not stop the others; failures are logged and left out of the count.
+    """
+    if not candidates:
+        return 0
+    try:
+        result = get_db()[CANDIDATES].bulk_write(
+            [ReplaceOne({"_id": c["_id"]}, c, upsert=True) for c in candidates], ordered=False)
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", [])[:3]:
+            logger.warning("Write error at batch index %s: %s", error.get("index"), error.get("errmsg"))
+        return details.get("nUpserted", 0) + details.get("nMatched", 0)
+    return result.upserted_count + result.matched_count
+
+def candidate_summary(candidate):
+    return {
+        "id": candidate["_id"],
+        "name": candidate.get("personal_information", {}).get("first_name", "Unknown"),
+    }
+
+def list_candidates_page(after=None, limit=50, search=None):
+    """One keyset page: {"candidates": [{"id", "name"}], "next_after": id or None}.
+
+    Pass the returned next_after back as `after` for the following page.
+    """
+    cursor = (get_db()[CANDIDATES]
+              .find(candidate_query(search, after), CANDIDATE_LIST_PROJECTION)
+              .sort("_id", ASCENDING)
+              .limit(limit + 1))
+    candidates = [candidate_summary(c) for c in cursor]
+    more = len(candidates) > limit
+    candidates = candidates[:limit]
+    return {"candidates": candidates, "next_after": candidates[-1]["id"] if more else None}
+
+
+# 2. Interview templates (written through src.templates, which versions them)
+
+def get_template(candidate_id):
+    return get_db()[TEMPLATES].find_one({"candidate_id": str(candidate_id)}, sort=LATEST_VERSION)
+
+
+# 3. Interviews
+
+def get_interview(candidate_id):
+    return get_db()[INTERVIEWS].find_one({"candidate_id": candidate_id}, sort=LATEST_INSERTED)
+
+def insert_interview(interview_doc):
+    return get_db()[INTERVIEWS].insert_one(interview_doc).inserted_id
+
+# An HR-round session is one interview document whose _id (an ObjectId made
+# when the session starts, so "latest" ordering still works) is written to as
+# each answer completes. Every interaction carries an `id` idempotency token,
+# so replaying a write after a Streamlit rerun or a retry changes nothing.
+
+def append_interaction(interview_id, candidate_id, interaction):
+    """Push `interaction` unless one with the same id is already stored; returns True if written."""
+    now = datetime.now(timezone.utc)
+    try:
+        get_db()[INTERVIEWS].update_one(
+            {"_id": interview_id, "candidate_id": candidate_id, "interactions.id": {"$ne": interaction["id"]}},
+            {
+                "$push": {"interactions": interaction},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"started_at": now, "status": "in_progress"},
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The document exists and already holds this token, so the filter
+        # missed and the upsert tried to create a second document with this _id
+        return False
+    return True
+
+def set_interaction_field(interview_id, interaction_id, field, value):
+    """Set one field (e.g. a follow-up) on a stored interaction; naturally idempotent."""
+    get_db()[INTERVIEWS].update_one(
+        {"_id": interview_id, "interactions.id": interaction_id},
+        {"$set": {f"interactions.$.{field}": value, "updated_at": datetime.now(timezone.utc)}},
+    )
+
+def complete_interview(interview_id, candidate_id):
+    now = datetime.now(timezone.utc)
+    get_db()[INTERVIEWS].update_one(
+        {"_id": interview_id},
+        {
+            "$set": {"status": "completed", "updated_at": now},
+            # $min keeps the first completion time however often this runs
+            "$min": {"completed_at": now},
+            "$setOnInsert": {"candidate_id": candidate_id, "started_at": now, "interactions": []},
+        },
+        upsert=True,
+    )
+
+
+# 4. Coding submissions
+
+def insert_coding_submission(submission):
+    return get_db(CODING_DB)[CODING_SUBMISSIONS].insert_one(submission).inserted_id
+
+
+# 5. Diagrams
+
+def insert_diagram(diagram):
+    return get_db()[DIAGRAMS].insert_one(diagram).inserted_id
+
+def get_latest_diagram(candidate_id):
+    return get_db()[DIAGRAMS].find_one({"candidate_id": candidate_id}, sort=LATEST_CREATED)
+
+
+# 6. Async variants
+
+async def aget_candidate(candidate_id):
+    return await get_async_db()[CANDIDATES].find_one({"_id": candidate_id})
+
+def alist_candidates(search=None, after=None, limit=0, batch_size=500):
+    """Async _id-ordered cursor of projected candidates; iterate with `async for`."""
+    return (get_async_db()[CANDIDATES]
+            .find(candidate_query(search, after), CANDIDATE_LIST_PROJECTION)
+            .sort("_id", ASCENDING)
+            .limit(limit)
+            .batch_size(batch_size))
+
+async def alist_candidates_page(after=None, limit=50, search=None):
+    candidates = [candidate_summary(c) async for c in alist_candidates(search, after, limit + 1)]
+    more = len(candidates) > limit
+    candidates = candidates[:limit]
+    return {"candidates": candidates, "next_after": candidates[-1]["id"] if more else None}
+
+async def aget_template(candidate_id):
+    return await get_async_db()[TEMPLATES].find_one({"candidate_id": str(candidate_id)}, sort=LATEST_VERSION)
+
+async def aget_interview(candidate_id):
+    return await get_async_db()[INTERVIEWS].find_one({"candidate_id": candidate_id}, sort=LATEST_INSERTED)
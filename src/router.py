@@ -0,0 +1,239 @@
+# Hedged multi-provider LLM router
+#
+# Sits where a single LLM used to sit in the chains (prompt | router | parser).
+# Each call goes to the primary backend; if it has not answered within a
+# deadline derived from that backend's recent p95 latency, the same request is
+# also sent to the next backend ("hedged"). Whichever finishes first wins and
+# the other is cancelled (async) or abandoned (sync threads cannot be killed).
+# A failed primary fails over to the next backend immediately.
+#
+# build_router() wraps every backend in its own GuardedLLM (src.ratelimit), so
+# hedged duplicates and failovers are rate limited too; chains then use the
+# router as is instead of guarding it a second time.
+#
+#   LLM_PROVIDER=router LLM_ROUTER_BACKENDS=euriai,groq
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain_core.runnables import Runnable
+
+from src.metrics import percentile
+from src.ratelimit import GuardedLLM, backend_guard
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling latency window and counters for one backend."""
+
+    def __init__(self, window=200):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "errors": 0, "wins": 0, "hedges": 0, "hedge_wins": 0, "cancelled": 0}
+
+    def observe(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def count(self, field):
+        with self._lock:
+            self.counts[field] += 1
+
+    def percentile(self, pct):
+        with self._lock:
+            latencies = list(self._latencies)
+        return percentile(latencies, pct)
+
+    def samples(self):
+        return len(self._latencies)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts)
+        for pct in (50, 95, 99):
+            value = self.percentile(pct)
+            stats[f"p{pct}_s"] = round(value, 4) if value is not None else None
+        stats["error_rate"] = round(stats["errors"] / stats["calls"], 4) if stats["calls"] else 0.0
+        return stats
+
+
+class LLMRouter(Runnable):
+    """Route calls across backends with p95-based hedging and failover.
+
+    `backends` is a list of (name, runnable) pairs in priority order.
+    """
+
+    def __init__(self, backends, hedge_factor=1.0, min_hedge_delay=0.25,
+                 max_hedge_delay=30.0, initial_hedge_delay=5.0, min_samples=20):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = list(backends)
+        # Chains guard the router itself only when its backends are not guarded
+        self.guards_backends = all(isinstance(llm, GuardedLLM) for _, llm in self.backends)
+        self.trackers = {name: LatencyTracker() for name, _ in self.backends}
+        self.hedge_factor = hedge_factor
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_samples = min_samples
+        self._pool = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_ROUTER_THREADS", "32")))
+
+    def hedge_delay(self, name):
+        """How long to wait on `name` before sending a hedged duplicate."""
+        tracker = self.trackers[name]
+        p95 = tracker.percentile(95)
+        if p95 is None or tracker.samples() < self.min_samples:
+            return self.initial_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, p95 * self.hedge_factor))
+
+    def stats(self):
+        return {name: tracker.stats() for name, tracker in self.trackers.items()}
+
+    # -- sync -----------------------------------------------------------------
+
+    def _call(self, name, llm, input, config):
+        tracker = self.trackers[name]
+        tracker.count("calls")
+        start = time.perf_counter()
+        try:
+            result = llm.invoke(input, config)
+        except Exception:
+            tracker.count("errors")
+            raise
+        tracker.observe(time.perf_counter() - start)
+        return result
+
+    def invoke(self, input, config=None, **kwargs):
+        errors = []
+        pending = {}
+        queue = list(self.backends)
+
+        def launch(hedge=False):
+            name, llm = queue.pop(0)
+            if hedge:
+                self.trackers[name].count("hedges")
+            # Pool threads do not inherit contextvars; carry the caller's (e.g. llm_priority)
+            context = contextvars.copy_context()
+            pending[self._pool.submit(context.run, self._call, name, llm, input, config)] = (name, hedge)
+            return name
+
+        primary = launch()
+        timeout = self.hedge_delay(primary)
+        while pending:
+            done, _ = wait(pending, timeout=timeout if queue else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary is slower than its p95: hedge on the next backend
+                launch(hedge=True)
+                timeout = None
+                continue
+            for future in done:
+                name, hedge = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("LLM backend '%s' failed: %s", name, e)
+                    errors.append(e)
+                    if queue and not pending:
+                        launch()
+                    continue
+                self._record_win(name, hedge)
+                for loser, (loser_name, _) in pending.items():
+                    # A running thread cannot be interrupted; its result is dropped
+                    loser.cancel()
+                    self.trackers[loser_name].count("cancelled")
+                return result
+        raise errors[-1]
+
+    def _record_win(self, name, hedge):
+        self.trackers[name].count("wins")
+        if hedge:
+            self.trackers[name].count("hedge_wins")
+
+    # -- async ----------------------------------------------------------------
+
+    async def _acall(self, name, llm, input, config):
+        tracker = self.trackers[name]
+        tracker.count("calls")
+        start = time.perf_counter()
+        try:
+            result = await llm.ainvoke(input, config)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            tracker.count("errors")
+            raise
+        tracker.observe(time.perf_counter() - start)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        errors = []
+        pending = {}
+        queue = list(self.backends)
+
+        def launch(hedge=False):
+            name, llm = queue.pop(0)
+            if hedge:
+                self.trackers[name].count("hedges")
+            pending[asyncio.ensure_future(self._acall(name, llm, input, config))] = (name, hedge)
+            return name
+
+        primary = launch()
+        timeout = self.hedge_delay(primary)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=timeout if queue else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(hedge=True)
+                    timeout = None
+                    continue
+                for task in done:
+                    name, hedge = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning("LLM backend '%s' failed: %s", name, e)
+                        errors.append(e)
+                        if queue and not pending:
+                            launch()
+                        continue
+                    self._record_win(name, hedge)
+                    return result
+            raise errors[-1]
+        finally:
+            for task, (name, _) in pending.items():
+                task.cancel()
+                self.trackers[name].count("cancelled")
+
+    # -- streaming: no hedging, the primary backend streams ----------------------
+
+    def stream(self, input, config=None, **kwargs):
+        name, llm = self.backends[0]
+        self.trackers[name].count("calls")
+        yield from llm.stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        name, llm = self.backends[0]
+        self.trackers[name].count("calls")
+        async for chunk in llm.astream(input, config, **kwargs):
+            yield chunk
+
+
+def build_router():
+    """Build an LLMRouter over the providers named in LLM_ROUTER_BACKENDS."""
+    from src.llm import get_llm
+
+    names = [n.strip() for n in os.getenv("LLM_ROUTER_BACKENDS", "euriai,groq").split(",") if n.strip()]
+    return LLMRouter(
+        [(name, GuardedLLM(get_llm(name), guard=backend_guard(name))) for name in names],
+        hedge_factor=float(os.getenv("LLM_ROUTER_HEDGE_FACTOR", "1.0")),
+        min_hedge_delay=float(os.getenv("LLM_ROUTER_MIN_HEDGE_DELAY", "0.25")),
+        initial_hedge_delay=float(os.getenv("LLM_ROUTER_INITIAL_HEDGE_DELAY", "5.0")),
+    )
@@ -0,0 +1,275 @@
+# Candidate scoring and cohort statistics
+#
+# Scores are computed inside MongoDB: an aggregation over a candidate's latest
+# interview document averages every answer score, follow-ups included, and
+# $merges the result into the `candidate_scores` summary collection (one small
+# document per candidate). Writers call refresh_candidate_score() after saving
+# an interview, so reads -- the results page, /results/{id}, /results/cohort --
+# only ever touch the summary, never rescan interviews.
+#
+#   python -m src.scores --rebuild     # recompute every candidate from scratch
+
+import argparse
+import json
+import logging
+
+from src.db import get_db, get_async_db
+from src.metrics import percentile
+from src.repository import INTERVIEWS
+
+logger = logging.getLogger(__name__)
+
+SCORES = "candidate_scores"
+PERCENTILES = (25, 50, 75, 90)
+FOLLOW_UP_KEYS = ("follow_up_1", "follow_up_2")
+
+
+# 1. Per-candidate summary
+
+def _summary_stages():
+    """Stages turning one interview document into its candidate_scores document."""
+    follow_up_scores = {"$filter": {
+        "input": [f"$$i.{key}.score" for key in FOLLOW_UP_KEYS],
+        "cond": {"$isNumber": "$$this"},
+    }}
+    all_scores = {"$filter": {
+        "input": {"$concatArrays": [
+            "$questions.score",
+            {"$reduce": {"input": "$questions.follow_up_scores", "initialValue": [],
+                         "in": {"$concatArrays": ["$$value", "$$this"]}}},
+        ]},
+        "cond": {"$isNumber": "$$this"},
+    }}
+    return [
+        {"$project": {
+            "candidate_id": 1,
+            "questions": {"$map": {
+                "input": {"$ifNull": ["$interactions", []]}, "as": "i",
+                "in": {"score": "$$i.score", "follow_up_scores": follow_up_scores},
+            }},
+        }},
+        {"$set": {"all_scores": all_scores}},
+        {"$project": {
+            "_id": "$candidate_id",
+            "questions": 1,
+            "question_count": {"$size": "$questions"},
+            "scored_answers": {"$size": "$all_scores"},
+            "follow_ups": {"$sum": {"$map": {"input": "$questions", "in": {"$size": "$$this.follow_up_scores"}}}},
+            "total_score": {"$sum": "$all_scores"},
+            "max_score": {"$multiply": [{"$size": "$all_scores"}, 10]},
+            # $avg over an empty array is null, so unscored interviews average to null
+            "average_score": {"$round": [{"$avg": "$all_scores"}, 2]},
+            "question_average": {"$round": [{"$avg": "$questions.score"}, 2]},
+            "updated_at": "$$NOW",
+        }},
+        {"$merge": {"into": SCORES, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def _candidate_pipeline(candidate_id):
+    # Latest interview only: older documents are earlier saves of the same session
+    return [
+        {"$match": {"candidate_id": candidate_id}},
+        {"$sort": {"_id": -1}},
+        {"$limit": 1},
+    ] + _summary_stages()
+
+
+def _rebuild_pipeline():
+    return [
+        {"$sort": {"candidate_id": 1, "_id": -1}},
+        {"$group": {"_id": "$candidate_id", "latest": {"$first": "$$ROOT"}}},
+        {"$replaceWith": "$latest"},
+    ] + _summary_stages()
+
+
+def _is_score(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def summarize_interview(interview):
+    """Python equivalent of _summary_stages, for storage backends without aggregation."""
+    questions = [{
+        "score": interaction.get("score"),
+        "follow_up_scores": [
+            interaction[key]["score"] for key in FOLLOW_UP_KEYS
+            if isinstance(interaction.get(key), dict) and _is_score(interaction[key].get("score"))
+        ],
+    } for interaction in interview.get("interactions") or []]
+    all_scores = [q["score"] for q in questions if _is_score(q["score"])]
+    all_scores += [score for q in questions for score in q["follow_up_scores"]]
+    question_scores = [q["score"] for q in questions if _is_score(q["score"])]
+    return {
+        "candidate_id": interview["candidate_id"],
+        "questions": questions,
+        "question_count": len(questions),
+        "scored_answers": len(all_scores),
+        "follow_ups": sum(len(q["follow_up_scores"]) for q in questions),
+        "total_score": sum(all_scores),
+        "max_score": len(all_scores) * 10,
+        "average_score": round(sum(all_scores) / len(all_scores), 2) if all_scores else None,
+        "question_average": round(sum(question_scores) / len(question_scores), 2) if question_scores else None,
+    }
+
+
+def _public(summary):
+    if summary is None:
+        return None
+    summary = dict(summary)
+    summary["candidate_id"] = summary.pop("_id")
+    return summary
+
+
+def refresh_candidate_score(candidate_id):
+    """Recompute one candidate's summary from their latest interview."""
+    get_db()[INTERVIEWS].aggregate(_candidate_pipeline(candidate_id))
+
+
+def rebuild_scores():
+    get_db()[INTERVIEWS].aggregate(_rebuild_pipeline())
+    return get_db()[SCORES].count_documents({})
+
+
+def get_candidate_score(candidate_id):
+    """Summary dict for a candidate (computed on first request), or None without an interview."""
+    summary = get_db()[SCORES].find_one({"_id": candidate_id})
+    if summary is None:
+        refresh_candidate_score(candidate_id)
+        summary = get_db()[SCORES].find_one({"_id": candidate_id})
+    return _public(summary)
+
+
+async def arefresh_candidate_score(candidate_id):
+    await (await get_async_db()[INTERVIEWS].aggregate(_candidate_pipeline(candidate_id))).to_list(None)
+
+
+async def aget_candidate_score(candidate_id):
+    summary = await get_async_db()[SCORES].find_one({"_id": candidate_id})
+    if summary is None:
+        await arefresh_candidate_score(candidate_id)
+        summary = await get_async_db()[SCORES].find_one({"_id": candidate_id})
+    return _public(summary)
+
+
+# 2. Cohort statistics
+
+def _percentile(p):
+    # Same nearest rank as src.metrics.percentile: round(p/100 * n) - 1, clamped to
+    # the sorted `scores` array ($round, like Python's round, rounds half to even)
+    size = {"$size": "$scores"}
+    rank = {"$subtract": [{"$round": [{"$multiply": [p / 100, size]}, 0]}, 1]}
+    index = {"$toInt": {"$max": [0, {"$min": [{"$subtract": [size, 1]}, rank]}]}}
+    return {"$arrayElemAt": ["$scores", index]}
+
+
+def _cohort_pipeline():
+    overall = [
+        {"$match": {"average_score": {"$type": "number"}}},
+        {"$sort": {"average_score": 1}},
+        {"$group": {
+            "_id": None,
+            "candidates": {"$sum": 1},
+            "average_score": {"$avg": "$average_score"},
+            "min_score": {"$min": "$average_score"},
+            "max_score": {"$max": "$average_score"},
+            "follow_ups": {"$sum": "$follow_ups"},
+            "scores": {"$push": "$average_score"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "candidates": 1,
+            "average_score": {"$round": ["$average_score", 2]},
+            "min_score": 1,
+            "max_score": 1,
+            "follow_ups": 1,
+            **{f"p{p}": _percentile(p) for p in PERCENTILES},
+        }},
+    ]
+    # Questions are generated per candidate, so they are compared by position
+    per_question = [
+        {"$unwind": {"path": "$questions", "includeArrayIndex": "position"}},
+        {"$match": {"questions.score": {"$type": "number"}}},
+        {"$group": {
+            "_id": "$position",
+            "answers": {"$sum": 1},
+            "average_score": {"$avg": "$questions.score"},
+            "min_score": {"$min": "$questions.score"},
+            "max_score": {"$max": "$questions.score"},
+            "follow_up_rate": {"$avg": {"$cond": [{"$gt": [{"$size": "$questions.follow_up_scores"}, 0]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {
+            "_id": 0,
+            "question": {"$add": ["$_id", 1]},
+            "answers": 1,
+            "average_score": {"$round": ["$average_score", 2]},
+            "min_score": 1,
+            "max_score": 1,
+            "follow_up_rate": {"$round": ["$follow_up_rate", 3]},
+        }},
+    ]
+    return [{"$facet": {"overall": overall, "per_question": per_question}}]
+
+
+def _cohort_result(result):
+    overall = result["overall"][0] if result["overall"] else {"candidates": 0}
+    return {**overall, "per_question": result["per_question"]}
+
+
+def cohort_stats():
+    return _cohort_result(next(get_db()[SCORES].aggregate(_cohort_pipeline())))
+
+
+async def acohort_stats():
+    cursor = await get_async_db()[SCORES].aggregate(_cohort_pipeline())
+    return _cohort_result((await cursor.to_list(None))[0])
+
+
+def summarize_cohort(summaries):
+    """Python equivalent of _cohort_pipeline over summarize_interview() results."""
+    summaries = list(summaries)
+    scored = sorted((s for s in summaries if _is_score(s["average_score"])), key=lambda s: s["average_score"])
+    values = [s["average_score"] for s in scored]
+    overall = {"candidates": 0}
+    if values:
+        overall = {
+            "candidates": len(values),
+            "average_score": round(sum(values) / len(values), 2),
+            "min_score": values[0],
+            "max_score": values[-1],
+            "follow_ups": sum(s["follow_ups"] for s in scored),
+            **{f"p{p}": percentile(values, p) for p in PERCENTILES},
+        }
+
+    by_position = {}
+    for summary in summaries:
+        for position, question in enumerate(summary["questions"]):
+            if _is_score(question["score"]):
+                by_position.setdefault(position, []).append(question)
+    per_question = []
+    for position, questions in sorted(by_position.items()):
+        question_scores = [q["score"] for q in questions]
+        per_question.append({
+            "question": position + 1,
+            "answers": len(questions),
+            "average_score": round(sum(question_scores) / len(question_scores), 2),
+            "min_score": min(question_scores),
+            "max_score": max(question_scores),
+            "follow_up_rate": round(sum(1 for q in questions if q["follow_up_scores"]) / len(questions), 3),
+        })
+    return {**overall, "per_question": per_question}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the candidate_scores summary collection")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every candidate from their interviews")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
+    if args.rebuild:
+        logger.info("Rebuilt %d candidate summaries", rebuild_scores())
+    logger.info("Cohort: %s", json.dumps(cohort_stats(), default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,553 @@
+# Pluggable storage backends
+#
+# Everything the app persists -- candidates, interview templates, interviews,
+# coding submissions and system-design diagrams -- goes through the Storage
+# interface below. STORAGE_BACKEND picks the implementation:
+#
+# - mongo (default): src.repository / src.templates / src.scores on MONGO_URI
+# - sqlite: one embedded SQLite file (SQLITE_PATH, default aieta.db, or
+#   ":memory:"), so local benchmarks, CI and single-node deployments need no
+#   MongoDB server. Documents are kept whole in JSON columns (bson json_util, so
+#   datetimes and ObjectIds round-trip) next to indexed key columns, and the
+#   database runs in WAL mode so readers never block the writer.
+#
+# Async methods default to running the sync one on a worker thread; the Mongo
+# backend overrides them with the native async client.
+
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from bson import json_util
+
+from src import repository, scores, templates
+from src.db import get_db
+
+_BACKENDS = {}
+_instance = None
+_lock = threading.Lock()
+
+
+def register_backend(name, factory):
+    """Register a zero-argument factory that builds the Storage for `name`."""
+    _BACKENDS[name] = factory
+
+
+def available_backends():
+    return sorted(_BACKENDS)
+
+
+def get_storage():
+    """Return the (lazily built, process-wide) storage backend selected by STORAGE_BACKEND."""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                name = os.getenv("STORAGE_BACKEND", "mongo")
+                if name not in _BACKENDS:
+                    raise ValueError(f"Unknown storage backend '{name}'. Available: {available_backends()}")
+                _instance = _BACKENDS[name]()
+    return _instance
+
+
+def reset_storage():
+    """Close and drop the current backend so the next get_storage() rebuilds it."""
+    global _instance
+    with _lock:
+        if _instance is not None:
+            _instance.close()
+        _instance = None
+
+
+class Storage:
+    """Persistence operations used by the app, the API and the pages."""
+
+    name = None
+
+    # Candidates
+    def get_candidate(self, candidate_id):
+        raise NotImplementedError
+
+    def upsert_candidates(self, candidates):
+        raise NotImplementedError
+
+    def list_candidates_page(self, after=None, limit=50, search=None):
+        """{"candidates": [{"id", "name"}], "next_after": id or None}, ordered by id."""
+        raise NotImplementedError
+
+    # Templates (versioned, see src.templates)
+    def get_latest_template(self, candidate_id):
+        raise NotImplementedError
+
+    def store_template(self, template_doc, keep=None):
+        """Returns (version, created)."""
+        raise NotImplementedError
+
+    # Interviews
+    def get_interview(self, candidate_id):
+        raise NotImplementedError
+
+    def append_interaction(self, interview_id, candidate_id, interaction):
+        """Idempotent on interaction["id"]; returns True if written."""
+        raise NotImplementedError
+
+    def set_interaction_field(self, interview_id, candidate_id, interaction_id, field, value):
+        raise NotImplementedError
+
+    def complete_interview(self, interview_id, candidate_id):
+        raise NotImplementedError
+
+    def get_candidate_score(self, candidate_id):
+        """Score summary of the latest interview (see src.scores), or None."""
+        raise NotImplementedError
+
+    def cohort_stats(self):
+        """Score distribution and per-question stats across candidates (see src.scores)."""
+        raise NotImplementedError
+
+    # Bulk reads for src.export, each ordered by candidate_id (optionally one candidate only)
+    def iter_interviews(self, candidate_id=None, batch_size=1000):
+        """Interview documents, newest first within a candidate."""
+        raise NotImplementedError
+
+    def iter_templates(self, candidate_id=None, batch_size=1000):
+        """{candidate_id, candidate_email, version, question_count}, latest version first."""
+        raise NotImplementedError
+
+    def iter_coding_submissions(self, candidate_id=None, batch_size=1000):
+        """{candidate_id, timestamp}, newest first."""
+        raise NotImplementedError
+
+    # Coding submissions and diagrams
+    def insert_coding_submission(self, submission):
+        raise NotImplementedError
+
+    def save_diagram(self, candidate_id, filename, data, content_type="image/png"):
+        raise NotImplementedError
+
+    def get_latest_diagram(self, candidate_id):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    # Async variants
+    async def aget_candidate(self, candidate_id):
+        return await asyncio.to_thread(self.get_candidate, candidate_id)
+
+    async def alist_candidates_page(self, after=None, limit=50, search=None):
+        return await asyncio.to_thread(self.list_candidates_page, after, limit, search)
+
+    async def alist_candidates(self, search=None, batch_size=500):
+        """Every matching {"id", "name"}, ordered by id; iterate with `async for`."""
+        after = None
+        while True:
+            page = await self.alist_candidates_page(after=after, limit=batch_size, search=search)
+            for candidate in page["candidates"]:
+                yield candidate
+            after = page["next_after"]
+            if after is None:
+                return
+
+    async def aget_latest_template(self, candidate_id):
+        return await asyncio.to_thread(self.get_latest_template, candidate_id)
+
+    async def astore_template(self, template_doc, keep=None):
+        return await asyncio.to_thread(self.store_template, template_doc, keep)
+
+    async def aget_interview(self, candidate_id):
+        return await asyncio.to_thread(self.get_interview, candidate_id)
+
+    async def aget_candidate_score(self, candidate_id):
+        return await asyncio.to_thread(self.get_candidate_score, candidate_id)
+
+    async def acohort_stats(self):
+        return await asyncio.to_thread(self.cohort_stats)
+
+
+# 1. MongoDB
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def get_candidate(self, candidate_id):
+        return repository.get_candidate(candidate_id)
+
+    def upsert_candidates(self, candidates):
+        return repository.upsert_candidates(candidates)
+
+    def list_candidates_page(self, after=None, limit=50, search=None):
+        return repository.list_candidates_page(after=after, limit=limit, search=search)
+
+    def get_latest_template(self, candidate_id):
+        return templates.get_latest_template(candidate_id)
+
+    def store_template(self, template_doc, keep=None):
+        return templates.store_template(template_doc, keep)
+
+    def get_interview(self, candidate_id):
+        return repository.get_interview(candidate_id)
+
+    # Writers keep the candidate_scores summary fresh so score reads stay cheap
+    def append_interaction(self, interview_id, candidate_id, interaction):
+        written = repository.append_interaction(interview_id, candidate_id, interaction)
+        scores.refresh_candidate_score(candidate_id)
+        return written
+
+    def set_interaction_field(self, interview_id, candidate_id, interaction_id, field, value):
+        repository.set_interaction_field(interview_id, interaction_id, field, value)
+        scores.refresh_candidate_score(candidate_id)
+
+    def complete_interview(self, interview_id, candidate_id):
+        repository.complete_interview(interview_id, candidate_id)
+
+    def get_candidate_score(self, candidate_id):
+        return scores.get_candidate_score(candidate_id)
+
+    def cohort_stats(self):
+        return scores.cohort_stats()
+
+    def iter_interviews(self, candidate_id=None, batch_size=1000):
+        match = {"candidate_id": candidate_id} if candidate_id else {}
+        return (get_db()[repository.INTERVIEWS]
+                .find(match, {"candidate_id": 1, "status": 1, "started_at": 1, "completed_at": 1, "interactions": 1})
+                .sort([("candidate_id", 1), ("_id", -1)])
+                .batch_size(batch_size))
+
+    def iter_templates(self, candidate_id=None, batch_size=1000):
+        match = {"candidate_id": candidate_id} if candidate_id else {}
+        return get_db()[repository.TEMPLATES].aggregate([
+            {"$match": match},
+            {"$sort": {"candidate_id": 1, "version": -1}},
+            {"$project": {"candidate_id": 1, "candidate_email": 1, "version": 1,
+                          "question_count": {"$size": {"$ifNull": ["$questions", []]}}}},
+        ], batchSize=batch_size)
+
+    def iter_coding_submissions(self, candidate_id=None, batch_size=1000):
+        match = {"candidate_id": candidate_id} if candidate_id else {}
+        return (get_db(repository.CODING_DB)[repository.CODING_SUBMISSIONS]
+                .find(match, {"candidate_id": 1, "timestamp": 1})
+                .sort([("candidate_id", 1), ("timestamp", -1)])
+                .batch_size(batch_size))
+
+    def insert_coding_submission(self, submission):
+        return repository.insert_coding_submission(submission)
+
+    def save_diagram(self, candidate_id, filename, data, content_type="image/png"):
+        return repository.insert_diagram({
+            "candidate_id": candidate_id,
+            "filename": filename,
+            "content_type": content_type,
+            "data": data,
+            "created_at": datetime.now(timezone.utc),
+        })
+
+    def get_latest_diagram(self, candidate_id):
+        return repository.get_latest_diagram(candidate_id)
+
+    async def aget_candidate(self, candidate_id):
+        return await repository.aget_candidate(candidate_id)
+
+    async def alist_candidates_page(self, after=None, limit=50, search=None):
+        return await repository.alist_candidates_page(after=after, limit=limit, search=search)
+
+    async def alist_candidates(self, search=None, batch_size=500):
+        # One cursor for the whole stream instead of a query per page
+        async for candidate in repository.alist_candidates(search=search, batch_size=batch_size):
+            yield repository.candidate_summary(candidate)
+
+    async def aget_latest_template(self, candidate_id):
+        return await templates.aget_latest_template(candidate_id)
+
+    async def astore_template(self, template_doc, keep=None):
+        return await templates.astore_template(template_doc, keep)
+
+    async def aget_interview(self, candidate_id):
+        return await repository.aget_interview(candidate_id)
+
+    async def aget_candidate_score(self, candidate_id):
+        return await scores.aget_candidate_score(candidate_id)
+
+    async def acohort_stats(self):
+        return await scores.acohort_stats()
+
+
+# 2. SQLite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id TEXT PRIMARY KEY,
+    first_name TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidates_first_name ON candidates (first_name);
+
+CREATE TABLE IF NOT EXISTS interview_templates (
+    id TEXT PRIMARY KEY,
+    candidate_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS templates_candidate_version
+    ON interview_templates (candidate_id, version DESC, content_hash);
+
+CREATE TABLE IF NOT EXISTS interviews (
+    id TEXT PRIMARY KEY,
+    candidate_id TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interviews_candidate_latest ON interviews (candidate_id, id DESC);
+
+CREATE TABLE IF NOT EXISTS coding_submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id TEXT NOT NULL,
+    timestamp TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coding_submissions_candidate_latest ON coding_submissions (candidate_id, timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS diagrams (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id TEXT NOT NULL,
+    filename TEXT,
+    content_type TEXT,
+    created_at TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS diagrams_candidate_latest ON diagrams (candidate_id, created_at DESC);
+"""
+
+
+def _dumps(doc):
+    return json_util.dumps(doc)
+
+
+def _loads(text):
+    return json_util.loads(text) if text is not None else None
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class SQLiteStorage(Storage):
+    """Embedded backend; one connection shared by all threads behind a lock."""
+
+    name = "sqlite"
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints rather than every commit; safe in WAL mode
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _one(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _scan(self, sql, params=(), batch_size=1000):
+        """Rows of a query, fetched `batch_size` at a time so other threads get the lock in between."""
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def _scan_docs(self, table, order, candidate_id, batch_size):
+        where, params = ("WHERE candidate_id = ?", (candidate_id,)) if candidate_id else ("", ())
+        for row in self._scan(f"SELECT doc FROM {table} {where} ORDER BY {order}", params, batch_size):
+            yield _loads(row[0])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Candidates
+
+    def get_candidate(self, candidate_id):
+        row = self._one("SELECT doc FROM candidates WHERE id = ?", (candidate_id,))
+        return _loads(row[0]) if row else None
+
+    def upsert_candidates(self, candidates):
+        rows = [(c["_id"], c.get("personal_information", {}).get("first_name"), _dumps(c)) for c in candidates]
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO candidates (id, first_name, doc) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def list_candidates_page(self, after=None, limit=50, search=None):
+        # Same prefix semantics as repository.candidate_query, as index range scans
+        where, params = [], []
+        if search:
+            search = search.strip()
+            ranges = [("id", p) for p in {search, search.upper()}]
+            ranges += [("first_name", p) for p in {search, search[:1].upper() + search[1:]}]
+            where.append("(" + " OR ".join(f"({col} >= ? AND {col} < ?)" for col, _ in ranges) + ")")
+            for _, prefix in ranges:
+                params += [prefix, prefix + "\uffff"]
+        if after is not None:
+            where.append("id > ?")
+            params.append(after)
+        sql = "SELECT id, first_name FROM candidates"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit + 1]).fetchall()
+        candidates = [{"id": row[0], "name": row[1] or "Unknown"} for row in rows]
+        more = len(candidates) > limit
+        candidates = candidates[:limit]
+        return {"candidates": candidates, "next_after": candidates[-1]["id"] if more else None}
+
+    # Templates
+
+    def _load_template(self, candidate_id):
+        row = self._one("SELECT doc FROM interview_templates WHERE candidate_id = ? ORDER BY version DESC LIMIT 1",
+                        (str(candidate_id),))
+        return _loads(row[0]) if row else None
+
+    def _template_head(self, candidate_id):
+        row = self._one("SELECT version, content_hash FROM interview_templates WHERE candidate_id = ? "
+                        "ORDER BY version DESC LIMIT 1", (str(candidate_id),))
+        return {"version": row[0], "content_hash": row[1]} if row else None
+
+    def get_latest_template(self, candidate_id):
+        return templates.get_latest_template(candidate_id, load=self._load_template, head=self._template_head)
+
+    def store_template(self, template_doc, keep=None):
+        keep = templates.TEMPLATE_RETENTION if keep is None else keep
+        candidate_id = template_doc["candidate_id"]
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT version, content_hash FROM interview_templates WHERE candidate_id = ? "
+                "ORDER BY version DESC LIMIT 1", (candidate_id,)).fetchone()
+            head = {"version": row[0], "content_hash": row[1]} if row else None
+            doc = templates.next_version(template_doc, head)
+            if doc is None:
+                return head["version"], False
+            conn.execute(
+                "INSERT INTO interview_templates (id, candidate_id, version, content_hash, doc) VALUES (?, ?, ?, ?, ?)",
+                (doc["_id"], candidate_id, doc["version"], doc["content_hash"], _dumps(doc)))
+            if keep:
+                conn.execute("DELETE FROM interview_templates WHERE candidate_id = ? AND version <= ?",
+                             (candidate_id, doc["version"] - keep))
+        templates.invalidate(candidate_id)
+        return doc["version"], True
+
+    # Interviews
+
+    def get_interview(self, candidate_id):
+        row = self._one("SELECT doc FROM interviews WHERE candidate_id = ? ORDER BY id DESC LIMIT 1", (candidate_id,))
+        return _loads(row[0]) if row else None
+
+    def _update_interview(self, interview_id, candidate_id, update):
+        """Read-modify-write one interview document in a transaction; `update` returns False to skip the write."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT doc FROM interviews WHERE id = ?", (str(interview_id),)).fetchone()
+            now = _now()
+            doc = _loads(row[0]) if row else {
+                "_id": interview_id, "candidate_id": candidate_id, "interactions": [],
+                "started_at": now, "status": "in_progress",
+            }
+            if update(doc) is False:
+                return False
+            doc["updated_at"] = now
+            conn.execute("INSERT OR REPLACE INTO interviews (id, candidate_id, doc) VALUES (?, ?, ?)",
+                         (str(interview_id), doc["candidate_id"], _dumps(doc)))
+            return True
+
+    def append_interaction(self, interview_id, candidate_id, interaction):
+        def update(doc):
+            if any(i.get("id") == interaction["id"] for i in doc["interactions"]):
+                return False
+            doc["interactions"].append(interaction)
+        return self._update_interview(interview_id, candidate_id, update)
+
+    def set_interaction_field(self, interview_id, candidate_id, interaction_id, field, value):
+        def update(doc):
+            matches = [i for i in doc["interactions"] if i.get("id") == interaction_id]
+            if not matches:
+                return False
+            matches[0][field] = value
+        self._update_interview(interview_id, candidate_id, update)
+
+    def complete_interview(self, interview_id, candidate_id):
+        def update(doc):
+            doc["status"] = "completed"
+            doc.setdefault("completed_at", _now())
+        self._update_interview(interview_id, candidate_id, update)
+
+    def get_candidate_score(self, candidate_id):
+        interview = self.get_interview(candidate_id)
+        return scores.summarize_interview(interview) if interview else None
+
+    def cohort_stats(self):
+        # Latest interview per candidate: SQLite takes the bare `doc` from the MAX(id) row
+        with self._lock:
+            rows = self._conn.execute("SELECT doc, MAX(id) FROM interviews GROUP BY candidate_id").fetchall()
+        return scores.summarize_cohort(scores.summarize_interview(_loads(row[0])) for row in rows)
+
+    # Bulk reads (served by the candidate indexes)
+
+    def iter_interviews(self, candidate_id=None, batch_size=1000):
+        return self._scan_docs("interviews", "candidate_id, id DESC", candidate_id, batch_size)
+
+    def iter_templates(self, candidate_id=None, batch_size=1000):
+        for doc in self._scan_docs("interview_templates", "candidate_id, version DESC", candidate_id, batch_size):
+            yield {"candidate_id": doc["candidate_id"], "candidate_email": doc.get("candidate_email"),
+                   "version": doc.get("version"), "question_count": len(doc.get("questions") or [])}
+
+    def iter_coding_submissions(self, candidate_id=None, batch_size=1000):
+        for doc in self._scan_docs("coding_submissions", "candidate_id, timestamp DESC", candidate_id, batch_size):
+            yield {"candidate_id": doc["candidate_id"], "timestamp": doc.get("timestamp")}
+
+    # Coding submissions and diagrams
+
+    def insert_coding_submission(self, submission):
+        timestamp = submission.get("timestamp")
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO coding_submissions (candidate_id, timestamp, doc) VALUES (?, ?, ?)",
+                (submission["candidate_id"], timestamp.isoformat() if timestamp else None, _dumps(submission)))
+        return cursor.lastrowid
+
+    def save_diagram(self, candidate_id, filename, data, content_type="image/png"):
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO diagrams (candidate_id, filename, content_type, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (candidate_id, filename, content_type, _now().isoformat(), data))
+        return cursor.lastrowid
+
+    def get_latest_diagram(self, candidate_id):
+        row = self._one(
+            "SELECT id, filename, content_type, created_at, data FROM diagrams "
+            "WHERE candidate_id = ? ORDER BY created_at DESC LIMIT 1", (candidate_id,))
+        if row is None:
+            return None
+        return {"_id": row[0], "candidate_id": candidate_id, "filename": row[1], "content_type": row[2],
+                "created_at": datetime.fromisoformat(row[3]), "data": row[4]}
+
+
+register_backend("mongo", MongoStorage)
+register_backend("sqlite", lambda: SQLiteStorage(os.getenv("SQLITE_PATH", "aieta.db")))
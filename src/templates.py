@@ -0,0 +1,307 @@
+# Versioned interview templates
+#
+# Each stored template gets a per-candidate `version` (1, 2, 3, ...) and a
+# `content_hash` of the greeting and questions. Storing a template whose
+# content matches the candidate's latest version is a no-op, so re-preparing a
+# candidate no longer piles up duplicates. The _id is "<candidate_id>:v<version>",
+# which makes two writers racing for the same version collide on the _id index
+# instead of both succeeding.
+#
+# The candidate_version index (candidate_id, version desc, content_hash) serves
+# the latest-template lookup and fully covers the "what is the latest version
+# and hash" check done on every store. After each new version only the newest
+# TEMPLATE_RETENTION versions are kept (0 keeps everything).
+#
+# Templates stored before versioning have no version; compact them with
+#
+#   python -m src.templates --compact [--keep 3]
+#
+# Latest templates are also cached per process (template_cache): a template
+# does not change during an interview, yet every Streamlit rerun of the HR
+# round asks for it. Storing a new version evicts the candidate's entry in the
+# storing process. Other processes (Streamlit vs the API) find out on their next
+# read: a cached entry is only served after a covered index lookup of the latest
+# version number confirms it, so a hit costs one tiny query instead of loading
+# and decoding the whole template. TEMPLATE_CACHE_TTL still bounds entry age.
+
+import argparse
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from pymongo import DeleteMany, DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from src import repository
+from src.cache import LRUCache, MISSING
+from src.db import get_db, get_async_db
+from src.repository import TEMPLATES, LATEST_VERSION
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_RETENTION = int(os.getenv("TEMPLATE_RETENTION", "3"))
+HEAD_PROJECTION = {"_id": 0, "version": 1, "content_hash": 1}
+MAX_ATTEMPTS = 5
+
+template_cache = LRUCache(
+    maxsize=int(os.getenv("TEMPLATE_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("TEMPLATE_CACHE_TTL", "300")),
+)
+_cache_stats = {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0}
+_stats_lock = threading.Lock()
+
+
+def content_hash(template_doc):
+    content = {"greeting_script": template_doc.get("greeting_script"), "questions": template_doc.get("questions")}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def next_version(template_doc, head):
+    """The document to insert after `head`, or None if it would repeat it."""
+    digest = content_hash(template_doc)
+    if head and head.get("content_hash") == digest:
+        return None
+    version = ((head or {}).get("version") or 0) + 1
+    return {**template_doc, "_id": f"{template_doc['candidate_id']}:v{version}",
+            "version": version, "content_hash": digest}
+
+
+def _expired(candidate_id, version, keep):
+    # $not also matches templates without a version, i.e. pre-versioning ones
+    return {"candidate_id": candidate_id, "version": {"$not": {"$gt": version - keep}}}
+
+
+# 1. Storing
+
+def store_template(template_doc, keep=None):
+    """Store `template_doc` as the candidate's next version; returns (version, created).
+
+    If the latest stored version has the same content nothing is written and
+    that version is returned with created=False.
+    """
+    keep = TEMPLATE_RETENTION if keep is None else keep
+    templates = get_db()[TEMPLATES]
+    candidate_id = template_doc["candidate_id"]
+    for _ in range(MAX_ATTEMPTS):
+        head = templates.find_one({"candidate_id": candidate_id}, HEAD_PROJECTION, sort=LATEST_VERSION)
+        doc = next_version(template_doc, head)
+        if doc is None:
+            return head["version"], False
+        try:
+            templates.insert_one(doc)
+        except DuplicateKeyError:
+            # Another writer stored this version first; look again
+            continue
+        invalidate(candidate_id)
+        if keep:
+            templates.delete_many(_expired(candidate_id, doc["version"], keep))
+        return doc["version"], True
+    raise RuntimeError(f"Could not store a template version for {candidate_id}")
+
+
+async def astore_template(template_doc, keep=None):
+    keep = TEMPLATE_RETENTION if keep is None else keep
+    templates = get_async_db()[TEMPLATES]
+    candidate_id = template_doc["candidate_id"]
+    for _ in range(MAX_ATTEMPTS):
+        head = await templates.find_one({"candidate_id": candidate_id}, HEAD_PROJECTION, sort=LATEST_VERSION)
+        doc = next_version(template_doc, head)
+        if doc is None:
+            return head["version"], False
+        try:
+            await templates.insert_one(doc)
+        except DuplicateKeyError:
+            continue
+        invalidate(candidate_id)
+        if keep:
+            await templates.delete_many(_expired(candidate_id, doc["version"], keep))
+        return doc["version"], True
+    raise RuntimeError(f"Could not store a template version for {candidate_id}")
+
+
+def store_templates(template_docs, keep=None):
+    """Bulk store_template() for one template per candidate; returns the number of new versions."""
+    keep = TEMPLATE_RETENTION if keep is None else keep
+    templates = get_db()[TEMPLATES]
+    ids = [doc["candidate_id"] for doc in template_docs]
+    heads = {h["_id"]: h for h in templates.aggregate([
+        {"$match": {"candidate_id": {"$in": ids}}},
+        {"$sort": {"candidate_id": 1, "version": -1}},
+        {"$group": {"_id": "$candidate_id", "version": {"$first": "$version"},
+                    "content_hash": {"$first": "$content_hash"}}},
+    ])}
+    docs = [doc for doc in (next_version(t, heads.get(t["candidate_id"])) for t in template_docs) if doc]
+    if not docs:
+        return 0
+    stored = docs
+    try:
+        templates.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Versions taken by a concurrent writer are left to that writer
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        stored = [doc for i, doc in enumerate(docs) if i not in failed]
+        logger.warning("%d template versions were already taken", len(failed))
+    for doc in stored:
+        invalidate(doc["candidate_id"])
+    if keep and stored:
+        templates.delete_many({"$or": [_expired(d["candidate_id"], d["version"], keep) for d in stored]})
+    return len(stored)
+
+
+# 2. Read-through cache
+
+def _count(field):
+    with _stats_lock:
+        _cache_stats[field] += 1
+
+
+def latest_head(candidate_id):
+    """{"version", "content_hash"} of the latest stored version, or None (covered by candidate_version)."""
+    return get_db()[TEMPLATES].find_one({"candidate_id": str(candidate_id)}, HEAD_PROJECTION, sort=LATEST_VERSION)
+
+
+async def alatest_head(candidate_id):
+    return await get_async_db()[TEMPLATES].find_one(
+        {"candidate_id": str(candidate_id)}, HEAD_PROJECTION, sort=LATEST_VERSION)
+
+
+def _cached(candidate_id):
+    return template_cache.get(str(candidate_id))
+
+
+def _served(candidate_id, template_doc, head):
+    """The cached `template_doc` if `head` confirms it is still the latest version, else MISSING."""
+    if head is None or (head.get("version"), head.get("content_hash")) != (
+            template_doc.get("version"), template_doc.get("content_hash")):
+        # Another process stored (or removed) a version since this entry was cached
+        template_cache.delete(str(candidate_id))
+        _count("stale")
+        return MISSING
+    _count("hits")
+    # Callers get their own copy, so editing the questions cannot leak into the cache
+    return copy.deepcopy(template_doc)
+
+
+def _remember(candidate_id, template_doc):
+    # Misses are not cached: the template is usually about to be created
+    if template_doc is not None:
+        template_cache.set(str(candidate_id), copy.deepcopy(template_doc))
+    return template_doc
+
+
+def get_latest_template(candidate_id, load=repository.get_template, head=latest_head):
+    """The candidate's latest template document, or None; served from template_cache when possible.
+
+    `load` fetches it on a miss and `head` checks a cached entry is still the
+    latest version (the MongoDB lookups unless a storage backend passes its own).
+    """
+    template_doc = _cached(candidate_id)
+    if template_doc is not MISSING:
+        template_doc = _served(candidate_id, template_doc, head(candidate_id))
+    else:
+        _count("misses")
+    if template_doc is MISSING:
+        template_doc = _remember(candidate_id, load(candidate_id))
+    return template_doc
+
+
+async def aget_latest_template(candidate_id):
+    template_doc = _cached(candidate_id)
+    if template_doc is not MISSING:
+        template_doc = _served(candidate_id, template_doc, await alatest_head(candidate_id))
+    else:
+        _count("misses")
+    if template_doc is MISSING:
+        template_doc = _remember(candidate_id, await repository.aget_template(candidate_id))
+    return template_doc
+
+
+def invalidate(candidate_id=None):
+    """Drop one candidate's cached template, or all of them."""
+    if candidate_id is None:
+        template_cache.clear()
+    else:
+        template_cache.delete(str(candidate_id))
+    _count("invalidations")
+
+
+def template_cache_stats():
+    with _stats_lock:
+        stats = dict(_cache_stats)
+    total = stats["hits"] + stats["misses"] + stats["stale"]
+    stats["hit_rate"] = round(stats["hits"] / total, 4) if total else 0.0
+    stats["entries"] = len(template_cache)
+    return stats
+
+
+# 3. Compaction
+
+def compact(keep=None, batch_size=500):
+    """Version pre-versioning templates and drop everything outside the retention window.
+
+    Legacy templates of a candidate who already has versioned ones are
+    deleted; otherwise they are numbered oldest first. Returns counts.
+    """
+    keep = TEMPLATE_RETENTION if keep is None else keep
+    templates = get_db()[TEMPLATES]
+    stats = {"versioned": 0, "deleted": 0}
+
+    def flush(ops):
+        if ops:
+            result = templates.bulk_write(ops, ordered=False)
+            stats["versioned"] += result.modified_count
+            stats["deleted"] += result.deleted_count
+        return []
+
+    # Legacy templates, grouped per candidate, newest first
+    ops = []
+    legacy = templates.aggregate([
+        {"$match": {"version": {"$exists": False}}},
+        {"$sort": {"candidate_id": 1, "created_at": -1}},
+        {"$group": {"_id": "$candidate_id", "ids": {"$push": "$_id"}}},
+    ], allowDiskUse=True)
+    for group in legacy:
+        candidate_id, legacy_ids = group["_id"], group["ids"]
+        if templates.find_one({"candidate_id": candidate_id, "version": {"$exists": True}}, HEAD_PROJECTION):
+            ops.append(DeleteMany({"_id": {"$in": legacy_ids}}))
+        else:
+            kept = legacy_ids[:keep] if keep else legacy_ids
+            for version, legacy_id in enumerate(reversed(kept), start=1):
+                doc = templates.find_one({"_id": legacy_id}, {"greeting_script": 1, "questions": 1})
+                ops.append(UpdateOne({"_id": legacy_id}, {"$set": {"version": version, "content_hash": content_hash(doc)}}))
+            ops.extend(DeleteOne({"_id": legacy_id}) for legacy_id in legacy_ids[len(kept):])
+        if len(ops) >= batch_size:
+            ops = flush(ops)
+    ops = flush(ops)
+
+    if keep:
+        latest = templates.aggregate([
+            {"$group": {"_id": "$candidate_id", "version": {"$max": "$version"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": keep}}},
+        ], allowDiskUse=True)
+        for head in latest:
+            ops.append(DeleteMany(_expired(head["_id"], head["version"], keep)))
+            if len(ops) >= batch_size:
+                ops = flush(ops)
+        flush(ops)
+    invalidate()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain versioned interview templates")
+    parser.add_argument("--compact", action="store_true", help="version legacy templates and apply retention")
+    parser.add_argument("--keep", type=int, default=TEMPLATE_RETENTION, help="versions to keep per candidate (0 = all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
+    if args.compact:
+        logger.info("Compacted: %s", compact(args.keep))
+    logger.info("%d templates stored", get_db()[TEMPLATES].estimated_document_count())
+
+
+if __name__ == "__main__":
+    main()
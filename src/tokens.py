@@ -0,0 +1,102 @@
+# Token accounting for LLM calls
+#
+# A LangChain callback attached to every compiled chain (see src.chains) counts
+# prompt and completion tokens with tiktoken and logs them per call, labelled
+# with the chain's operation name. Without tiktoken, counts fall back to a
+# 4-characters-per-token estimate.
+#
+# The encoder loads lazily (possibly downloading its file). The API loads it at
+# startup with load_encoder(), so the first request does not pay for it.
+
+import logging
+import os
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding(os.getenv("TOKENIZER_ENCODING", "o200k_base"))
+                except Exception as e:
+                    logger.warning("tiktoken unavailable (%s); estimating tokens from length", e)
+                    _encoder = False
+    return _encoder
+
+
+def load_encoder():
+    """Load the encoder now rather than inside the first LLM call; True if tiktoken is in use."""
+    return bool(_get_encoder())
+
+
+def count_tokens(text):
+    encoder = _get_encoder()
+    if not encoder:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+class TokenUsage:
+    """Per-operation call and token totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, operation, prompt_tokens, completion_tokens):
+        with self._lock:
+            totals = self._totals.setdefault(operation, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+        logger.info("%s: %d prompt tokens, %d completion tokens", operation, prompt_tokens, completion_tokens)
+
+    def stats(self):
+        with self._lock:
+            return {op: dict(totals) for op, totals in self._totals.items()}
+
+
+token_usage = TokenUsage()
+
+
+def _message_text(messages):
+    return "\n".join(str(getattr(m, "content", m)) for m in messages)
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Counts tokens between on_llm_start/on_chat_model_start and on_llm_end."""
+
+    def __init__(self, usage=token_usage):
+        self.usage = usage
+        self._pending = {}
+
+    def _start(self, run_id, text, metadata):
+        operation = (metadata or {}).get("operation", "llm")
+        self._pending[run_id] = (operation, count_tokens(text))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "\n".join(prompts), metadata)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "\n".join(_message_text(batch) for batch in messages), metadata)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        operation, prompt_tokens = self._pending.pop(run_id, ("llm", 0))
+        completion = "".join(g.text for generations in response.generations for g in generations)
+        self.usage.record(operation, prompt_tokens, count_tokens(completion))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._pending.pop(run_id, None)
+
+
+token_usage_handler = TokenUsageHandler()
@@ -0,0 +1,53 @@
+# Shared Streamlit widgets
+#
+# Streamlit reruns the whole page script on every widget interaction, so
+# anything that queries the database here is cached: a candidate page is fetched
+# once per (search, cursor) for CANDIDATE_PAGE_TTL seconds, however many times
+# the page reruns.
+
+import os
+
+import streamlit as st
+
+from src.storage import get_storage
+
+CANDIDATE_PAGE_SIZE = 20
+CANDIDATE_PAGE_TTL = int(os.getenv("CANDIDATE_PAGE_TTL", "60"))
+
+
+@st.cache_data(ttl=CANDIDATE_PAGE_TTL, show_spinner=False)
+def candidate_page(after, limit, search):
+    return get_storage().list_candidates_page(after=after, limit=limit, search=search or None)
+
+
+def candidate_picker(key="candidate", page_size=CANDIDATE_PAGE_SIZE):
+    """Search box plus a paged candidate select box; returns the chosen candidate id."""
+    search = st.text_input("🔍 Search by candidate ID or first name", key=f"{key}_search")
+
+    # Stack of `after` cursors, one per page visited; a new search starts over
+    state_key = f"{key}_pages"
+    if st.session_state.get(f"{key}_last_search") != search:
+        st.session_state[state_key] = [None]
+        st.session_state[f"{key}_last_search"] = search
+    cursors = st.session_state.setdefault(state_key, [None])
+
+    page = candidate_page(cursors[-1], page_size, search)
+    if not page["candidates"]:
+        st.info("No candidates found.")
+        return None
+
+    labels = {c["id"]: f"🆔 {c['id']} - 👤 {c['name']}" for c in page["candidates"]}
+    candidate_id = st.selectbox("Candidate", list(labels), format_func=labels.get, key=f"{key}_select")
+
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.caption(f"Page {len(cursors)}")
+    with next_col:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=page["next_after"] is None):
+            cursors.append(page["next_after"])
+            st.rerun()
+    return candidate_id
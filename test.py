@@ -1,27 +1,22 @@
 from src.helper import *
+from src.storage import get_storage
+from src.ui import candidate_picker
 import streamlit as st
 
 
 st.title('Score')
 
-client = MongoClient(os.environ['MONGO_URI'])
-db = client['aieta']
-collection = db['candidates']
 st.subheader("Available Candidates:")
-for candidate in collection.find({}, {'_id': 1, 'personal_information.first_name': 1}):
-    st.write(f"🆔 {candidate['_id']} - 👤 {candidate['personal_information'].get('first_name', 'Unknown')}")
-
-candidate_id = st.text_input('Enter Candidate ID')
+candidate_id = candidate_picker("test")
 
 if st.button('Submit'):
     if candidate_id:
 
-        avg_score, length_scores, total_scores = get_candidate_average_score(candidate_id)
-        
-        st.write(f'Average Score You Get {avg_score}, \n Total Score is {length_scores}, \n Scores You Get {total_scores}')
+        score = get_candidate_average_score(candidate_id) or {}
+
+        st.write(f'Average Score You Get {score.get("average_score")}, \n Total Score is {score.get("max_score")}, \n Scores You Get {score.get("total_score")}')
 
-        collection = db['interviews']
-        document = collection.find_one({"candidate_id": candidate_id})
+        document = get_storage().get_interview(candidate_id)
         if document:
             st.subheader("Candidate ID:")
             st.write(document["candidate_id"])
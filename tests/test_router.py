@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import Runnable
+
+from src.ratelimit import BATCH, INTERACTIVE, CircuitBreaker, GuardedLLM, LLMGuard, TokenBucket, llm_priority
+from src.router import LLMRouter
+
+
+class FakeBackend(Runnable):
+    """Answers `reply` after `delay` seconds, or raises `error`."""
+
+    def __init__(self, reply, delay=0.0, error=None):
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.reply
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.reply
+
+
+def make_guard():
+    buckets = {INTERACTIVE: TokenBucket(INTERACTIVE, 100, 100), BATCH: TokenBucket(BATCH, 100, 100)}
+    return LLMGuard(buckets, CircuitBreaker(), {INTERACTIVE: 1.0, BATCH: 1.0})
+
+
+def test_batch_priority_routed_call_debits_batch_bucket():
+    guard = make_guard()
+    router = LLMRouter([("primary", GuardedLLM(FakeBackend("A"), guard=guard))])
+    with llm_priority(BATCH):
+        assert router.invoke("hi") == "A"
+    assert guard.counts[BATCH]["granted"] == 1
+    assert guard.counts[INTERACTIVE]["granted"] == 0
+
+
+def test_batch_priority_routed_async_call_debits_batch_bucket():
+    guard = make_guard()
+    router = LLMRouter([("primary", GuardedLLM(FakeBackend("A"), guard=guard))])
+
+    async def call():
+        with llm_priority(BATCH):
+            return await router.ainvoke("hi")
+
+    assert asyncio.run(call()) == "A"
+    assert guard.counts[BATCH]["granted"] == 1
+    assert guard.counts[INTERACTIVE]["granted"] == 0
+
+
+# Hedging
+
+def test_hedge_fires_after_the_delay_and_wins_against_a_stalled_primary():
+    slow, fast = FakeBackend("slow", delay=0.5), FakeBackend("fast", delay=0.01)
+    router = LLMRouter([("slow", slow), ("fast", fast)], initial_hedge_delay=0.05)
+    start = time.perf_counter()
+    assert router.invoke("x") == "fast"
+    elapsed = time.perf_counter() - start
+    assert 0.05 <= elapsed < 0.3
+    assert router.stats()["fast"]["hedges"] == 1
+    assert router.stats()["fast"]["hedge_wins"] == 1
+
+
+def test_no_hedge_when_the_primary_answers_before_the_delay():
+    primary, secondary = FakeBackend("primary", delay=0.01), FakeBackend("secondary")
+    router = LLMRouter([("primary", primary), ("secondary", secondary)], initial_hedge_delay=0.2)
+    assert router.invoke("x") == "primary"
+    assert secondary.calls == 0
+
+
+def test_async_hedge_fires_after_the_delay():
+    slow, fast = FakeBackend("slow", delay=0.5), FakeBackend("fast", delay=0.01)
+    router = LLMRouter([("slow", slow), ("fast", fast)], initial_hedge_delay=0.05)
+    start = time.perf_counter()
+    assert asyncio.run(router.ainvoke("x")) == "fast"
+    assert 0.05 <= time.perf_counter() - start < 0.3
+    assert router.stats()["fast"]["hedge_wins"] == 1
+
+
+# Failover
+
+def test_failed_primary_fails_over_to_the_fallback():
+    broken, fallback = FakeBackend("broken", error=RuntimeError("down")), FakeBackend("fallback")
+    router = LLMRouter([("broken", broken), ("fallback", fallback)], initial_hedge_delay=10)
+    start = time.perf_counter()
+    assert router.invoke("x") == "fallback"
+    # Straight away, not after the hedge delay
+    assert time.perf_counter() - start < 1
+    assert router.stats()["broken"]["errors"] == 1
+    assert router.stats()["fallback"]["hedges"] == 0
+
+
+def test_async_failed_primary_fails_over_to_the_fallback():
+    broken, fallback = FakeBackend("broken", error=RuntimeError("down")), FakeBackend("fallback")
+    router = LLMRouter([("broken", broken), ("fallback", fallback)], initial_hedge_delay=10)
+    assert asyncio.run(router.ainvoke("x")) == "fallback"
+    assert router.stats()["broken"]["errors"] == 1
+
+
+def test_error_surfaces_when_every_backend_fails():
+    router = LLMRouter([("a", FakeBackend("a", error=RuntimeError("a down"))),
+                        ("b", FakeBackend("b", error=RuntimeError("b down")))], initial_hedge_delay=10)
+    with pytest.raises(RuntimeError, match="b down"):
+        router.invoke("x")
+    with pytest.raises(RuntimeError, match="b down"):
+        asyncio.run(router.ainvoke("x"))
+
+
+# Losers
+
+def test_async_loser_is_cancelled():
+    slow, fast = FakeBackend("slow", delay=0.5), FakeBackend("fast", delay=0.01)
+    router = LLMRouter([("slow", slow), ("fast", fast)], initial_hedge_delay=0.05)
+
+    async def call():
+        result = await router.ainvoke("x")
+        await asyncio.sleep(0.01)  # let the cancelled task unwind
+        return result
+
+    assert asyncio.run(call()) == "fast"
+    assert slow.cancelled == 1
+    assert router.stats()["slow"]["cancelled"] == 1
+
+
+def test_sync_loser_is_discarded_without_waiting_for_it():
+    slow, fast = FakeBackend("slow", delay=0.5), FakeBackend("fast", delay=0.01)
+    router = LLMRouter([("slow", slow), ("fast", fast)], initial_hedge_delay=0.05)
+    start = time.perf_counter()
+    assert router.invoke("x") == "fast"
+    assert time.perf_counter() - start < 0.3
+    assert router.stats()["slow"]["cancelled"] == 1
+    assert router.stats()["slow"]["wins"] == 0